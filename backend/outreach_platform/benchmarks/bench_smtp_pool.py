@@ -0,0 +1,135 @@
+"""Benchmark for sending campaign emails over pooled SMTP sessions
+
+Sends the same messages to a local aiosmtpd server twice: with a new
+session per message, as before, and through an SMTPConnectionPool of one
+session. Checks that the pool delivered every message over that single
+session. The local server has no STARTTLS or login, so this understates
+the saving against a real provider.
+
+Then checks the pool against the same server when the server drops its
+sessions, which the pool must reconnect after, and when several threads
+send at once, which must share at most size sessions.
+
+Requires aiosmtpd (pip install aiosmtpd). Run from backend/outreach_platform:
+
+    python benchmarks/bench_smtp_pool.py
+"""
+import os
+import smtplib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+
+from src.tasks.outreach import SMTPConnectionPool
+
+HOST = '127.0.0.1'
+PORT = 8025
+
+class CountingHandler:
+    """Counts SMTP sessions, each of which greets once, and delivered messages"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.messages = 0
+        self.connections = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        self.sessions += 1
+        self.connections.append(server)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return '250 OK'
+
+def build_messages(count=500):
+    messages = []
+    for i in range(count):
+        msg = MIMEText(f'Hi Business {i}, we would love to help you reach more customers.', 'plain')
+        msg['From'] = 'outreach@example.com'
+        msg['To'] = f'info@business{i}.example.com'
+        msg['Subject'] = 'Grow your business'
+        messages.append(msg)
+    return messages
+
+def send_per_message(messages):
+    """Previous implementation: one session per message"""
+    for msg in messages:
+        server = smtplib.SMTP(HOST, PORT)
+        server.send_message(msg)
+        server.quit()
+
+def send_pooled(messages):
+    pool = SMTPConnectionPool(HOST, PORT, use_tls=False, size=1)
+    for msg in messages:
+        pool.send_message(msg)
+    pool.close()
+
+def send_parallel(messages, size=4, threads=8):
+    pool = SMTPConnectionPool(HOST, PORT, use_tls=False, size=size)
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(pool.send_message, messages))
+    pool.close()
+
+def drop_connections(controller, handler):
+    """Close every session from the server side, as an idle timeout would"""
+    for server in handler.connections:
+        if server.transport is not None:
+            controller.loop.call_soon_threadsafe(server.transport.close)
+    handler.connections = []
+    time.sleep(0.1)
+
+def check_reconnect(controller, handler, messages):
+    """Sends over a pooled session, then over a new one once the server dropped it"""
+    handler.sessions = handler.messages = 0
+    half = len(messages) // 2
+    
+    pool = SMTPConnectionPool(HOST, PORT, use_tls=False, size=1)
+    for msg in messages[:half]:
+        pool.send_message(msg)
+    drop_connections(controller, handler)
+    for msg in messages[half:]:
+        pool.send_message(msg)
+    pool.close()
+    
+    assert handler.messages == len(messages), f'{handler.messages} of {len(messages)} messages delivered'
+    assert handler.sessions == 2, f'reconnecting used {handler.sessions} sessions'
+    return handler.sessions
+
+def measure(function, messages, handler):
+    handler.sessions = handler.messages = 0
+    start = time.perf_counter()
+    function(messages)
+    elapsed = time.perf_counter() - start
+
+    assert handler.messages == len(messages), f'{handler.messages} of {len(messages)} messages delivered'
+    return elapsed, handler.sessions
+
+if __name__ == '__main__':
+    handler = CountingHandler()
+    controller = Controller(handler, hostname=HOST, port=PORT)
+    controller.start()
+
+    try:
+        messages = build_messages()
+        before, before_sessions = measure(send_per_message, messages, handler)
+        after, after_sessions = measure(send_pooled, messages, handler)
+        parallel, parallel_sessions = measure(send_parallel, messages, handler)
+        reconnect_sessions = check_reconnect(controller, handler, messages[:20])
+    finally:
+        controller.stop()
+
+    assert after_sessions == 1, f'pooled send used {after_sessions} sessions'
+    assert 1 < parallel_sessions <= 4, f'8 threads on a pool of 4 used {parallel_sessions} sessions'
+
+    print(f'{len(messages)} messages')
+    print(f'session per message: {before:.2f} s over {before_sessions} sessions')
+    print(f'pooled session:      {after:.2f} s over {after_sessions} session')
+    print(f'speedup:             {before / after:.1f}x')
+    print(f'8 threads, pool of 4: {parallel:.2f} s over {parallel_sessions} sessions')
+    print(f'dropped by server:   20 messages over {reconnect_sessions} sessions')
@@ -0,0 +1,76 @@
+"""Micro-benchmark for social media link classification
+
+Run from backend/outreach_platform:
+
+    python benchmarks/bench_social_links.py
+"""
+import os
+import re
+import sys
+import timeit
+from types import SimpleNamespace
+from urllib.parse import urljoin
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tasks.scanner import OnlinePresenceScanner
+
+PAGE_URL = 'https://www.example.com/'
+
+SCANNER = OnlinePresenceScanner()
+
+def build_hrefs(count=5000):
+    """Links of a link-heavy marketing page, mostly not social media"""
+    hrefs = []
+    for i in range(count):
+        if i % 50 == 0:
+            hrefs.append(f'https://www.facebook.com/page{i}')
+        elif i % 50 == 1:
+            hrefs.append(f'https://www.linkedin.com/company/company-{i}')
+        elif i % 3 == 0:
+            hrefs.append(f'/products/category-{i}/item-{i}?ref=nav')
+        else:
+            hrefs.append(f'https://cdn.example.com/assets/{i}/landing-page.html#section-{i}')
+    return hrefs
+
+def classify_per_pattern(hrefs, url=PAGE_URL):
+    """Previous implementation, copied loop for loop
+
+    One uncompiled re.search per platform pattern. The break only leaves
+    the pattern loop, so the remaining platforms are still tried for a
+    link that already matched one.
+    """
+    social_links = {}
+    for href in hrefs:
+        for platform, patterns in OnlinePresenceScanner.SOCIAL_PATTERNS.items():
+            for pattern in patterns:
+                match = re.search(pattern, href, re.IGNORECASE)
+                if match:
+                    # Clean up the URL
+                    if not href.startswith('http'):
+                        href = urljoin(url, href)
+
+                    if platform not in social_links:
+                        social_links[platform] = []
+
+                    if href not in social_links[platform]:
+                        social_links[platform].append(href)
+                    break
+    return social_links
+
+def classify_combined(hrefs, url=PAGE_URL):
+    """Current implementation: OnlinePresenceScanner.find_social_media_links"""
+    page = SimpleNamespace(links=[(href, '') for href in hrefs])
+    return SCANNER.find_social_media_links(page, url)
+
+if __name__ == '__main__':
+    hrefs = build_hrefs()
+    assert classify_per_pattern(hrefs) == classify_combined(hrefs)
+
+    runs = 20
+    before = min(timeit.repeat(lambda: classify_per_pattern(hrefs), number=runs, repeat=3)) / runs
+    after = min(timeit.repeat(lambda: classify_combined(hrefs), number=runs, repeat=3)) / runs
+
+    print(f'{len(hrefs)} links per page')
+    print(f'per-pattern search: {before * 1000:.2f} ms/page')
+    print(f'combined pattern:   {after * 1000:.2f} ms/page')
+    print(f'speedup:            {before / after:.1f}x')
@@ -0,0 +1,124 @@
+"""Benchmark for rendering personalized campaign messages
+
+First renders 1M messages for distinct businesses, so the render cache
+misses on every message and only the compiled single-pass rendering is
+measured. Then sends to email and two social platforms per business the
+way prepare_batch does, where the previous code rendered each social
+message twice.
+
+Run from backend/outreach_platform:
+
+    python benchmarks/bench_templates.py
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tasks.message_template import compile_template
+
+TEMPLATE = (
+    "Hi {business_name} team,\n\n"
+    "I came across {website} and loved what you are doing. We help local businesses "
+    "like yours reach more customers, and I would love to show you how.\n\n"
+    "Could I reach you at {contact_value} or {phone} to set up a short call?\n\n"
+    "Best regards,\nThe Outreach Team"
+)
+
+SOCIAL_TEMPLATE = (
+    "Hi {business_name}! We love {website} and would like to tell you how we help "
+    "businesses like yours find new customers. Do you have a few minutes this week?"
+)
+
+SOCIAL_PLATFORMS = ('facebook', 'instagram')
+
+def build_recipients(count=100000):
+    """Distinct (business, contact) pairs"""
+    recipients = []
+    for i in range(count):
+        business = SimpleNamespace(
+            name=f'Business {i}',
+            website=f'https://business{i}.example.com',
+            email=f'info@business{i}.example.com',
+            phone_number=f'+1 555 {i:07d}',
+            address=f'{i} Main Street'
+        )
+        contact = SimpleNamespace(type='email', value=business.email)
+        recipients.append((business, contact))
+    return recipients
+
+def render_replace(template, business, contact):
+    """Previous implementation: one str.replace pass per placeholder"""
+    placeholders = {
+        '{business_name}': business.name or '',
+        '{website}': business.website or '',
+        '{email}': business.email or '',
+        '{phone}': business.phone_number or '',
+        '{address}': business.address or '',
+        '{contact_value}': contact.value or '',
+        '{contact_type}': contact.type or ''
+    }
+
+    personalized_message = template
+    for placeholder, value in placeholders.items():
+        personalized_message = personalized_message.replace(placeholder, value)
+    return personalized_message
+
+def run_replace(recipients, passes):
+    for _ in range(passes):
+        for business, contact in recipients:
+            render_replace(TEMPLATE, business, contact)
+
+def run_compiled(recipients, passes):
+    for _ in range(passes):
+        for business, contact in recipients:
+            compile_template(TEMPLATE).render(business, contact)
+
+def run_platforms_replace(recipients, passes):
+    for _ in range(passes):
+        for business, contact in recipients:
+            render_replace(SOCIAL_TEMPLATE, business, contact)
+            for platform in SOCIAL_PLATFORMS:
+                # Rendered once for the message and again for its instructions
+                render_replace(SOCIAL_TEMPLATE, business, contact)
+                render_replace(SOCIAL_TEMPLATE, business, contact)
+
+def run_platforms_compiled(recipients, passes):
+    for _ in range(passes):
+        for business, contact in recipients:
+            template = compile_template(SOCIAL_TEMPLATE)
+            template.render(business, contact)
+            for platform in SOCIAL_PLATFORMS:
+                template.render(business, contact)
+
+def measure(function, recipients, passes):
+    start = time.perf_counter()
+    function(recipients, passes)
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    recipients = build_recipients()
+    passes = 10
+    total = len(recipients) * passes
+
+    for business, contact in recipients[:100]:
+        assert render_replace(TEMPLATE, business, contact) == compile_template(TEMPLATE).render(business, contact)
+
+    before = measure(run_replace, recipients, passes)
+    after = measure(run_compiled, recipients, passes)
+
+    print(f'{total} messages for distinct recipients')
+    print(f'str.replace passes: {before:.2f} s ({before / total * 1e6:.2f} us/message)')
+    print(f'compiled template:  {after:.2f} s ({after / total * 1e6:.2f} us/message)')
+    print(f'speedup:            {before / after:.1f}x')
+
+    passes = 3
+    total = len(recipients) * passes * (1 + len(SOCIAL_PLATFORMS))
+    before = measure(run_platforms_replace, recipients, passes)
+    after = measure(run_platforms_compiled, recipients, passes)
+
+    print(f'{total} messages over email and {len(SOCIAL_PLATFORMS)} social platforms')
+    print(f'str.replace passes: {before:.2f} s ({before / total * 1e6:.2f} us/message)')
+    print(f'compiled template:  {after:.2f} s ({after / total * 1e6:.2f} us/message)')
+    print(f'speedup:            {before / after:.1f}x')
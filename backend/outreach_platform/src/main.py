@@ -3,16 +3,19 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+import click
+from datetime import date
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
-from src.models.business import Business, Contact, Campaign, Message
+from src.models.business import Business, Contact, Campaign, CampaignCheckpoint, Message, MessageDailyRollup
 from src.routes.user import user_bp
 from src.routes.business import business_bp
 from src.routes.tasks import tasks_bp
 from src.routes.scanner import scanner_bp
 from src.routes.campaigns import campaigns_bp
 from src.routes.analytics import analytics_bp
+from src.services.rollups import backfill_rollups
 from src.tasks.celery_app import make_celery
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
@@ -40,6 +43,13 @@ celery = make_celery(app)
 with app.app_context():
     db.create_all()
 
+@app.cli.command('rebuild-rollups')
+@click.option('--since', help='First day to rebuild, YYYY-MM-DD (default: the oldest message)')
+def rebuild_rollups_command(since):
+    """Backfill the daily message rollups from the message timestamps"""
+    rows = backfill_rollups(date.fromisoformat(since) if since else None)
+    click.echo(f"Rebuilt {rows} message rollup counters")
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -0,0 +1,60 @@
+from src.models.user import db
+
+def insert_ignoring_conflicts(model, rows):
+    """Insert rows in one statement, skipping rows that violate a unique constraint"""
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        statement = insert(model).on_conflict_do_nothing()
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        statement = insert(model).on_conflict_do_nothing()
+    elif dialect in ('mysql', 'mariadb'):
+        statement = db.insert(model).prefix_with('IGNORE')
+    else:
+        raise ValueError(f"Conflict-tolerant inserts are not supported for {dialect}")
+
+    db.session.execute(statement, rows)
+
+def upsert_counts(model, rows, keys, column='count', increment=True):
+    """Insert counter rows in one statement, updating the counters that already exist
+
+    keys are the columns of the unique constraint that identifies a counter.
+    Existing counters are added to, or overwritten unless increment is set.
+    """
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    counter = model.__table__.c[column]
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(model)
+        value = statement.excluded[column]
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={column: counter + value if increment else value}
+        )
+    elif dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(model)
+        value = statement.inserted[column]
+        statement = statement.on_duplicate_key_update({column: counter + value if increment else value})
+    else:
+        raise ValueError(f"Counter upserts are not supported for {dialect}")
+
+    db.session.execute(statement, rows)
+
+def increment_counts(model, rows, keys, column='count'):
+    """Insert counter rows in one statement, adding to the counters that already exist"""
+    upsert_counts(model, rows, keys, column, increment=True)
+
+def replace_counts(model, rows, keys, column='count'):
+    """Insert counter rows in one statement, overwriting the counters that already exist"""
+    upsert_counts(model, rows, keys, column, increment=False)
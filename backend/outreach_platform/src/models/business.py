@@ -80,6 +80,8 @@ class Campaign(db.Model):
     
     # Relationships
     messages = db.relationship('Message', backref='campaign', lazy=True, cascade='all, delete-orphan')
+    checkpoint = db.relationship('CampaignCheckpoint', backref='campaign', uselist=False, cascade='all, delete-orphan')
+    rollups = db.relationship('MessageDailyRollup', backref='campaign', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Campaign {self.name}>'
@@ -94,6 +96,18 @@ class Campaign(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class CampaignCheckpoint(db.Model):
+    __tablename__ = 'campaign_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False, unique=True)
+    platforms = db.Column(db.Text, nullable=False)  # JSON list of platforms being sent to
+    business_ids = db.Column(db.Text, nullable=False)  # JSON list of businesses not reached before the pause
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CampaignCheckpoint {self.campaign_id}>'
+
 class Message(db.Model):
     __tablename__ = 'messages'
     
@@ -108,8 +122,11 @@ class Message(db.Model):
     opened_at = db.Column(db.DateTime, nullable=True)
     replied_at = db.Column(db.DateTime, nullable=True)
     
-    # Unique constraint to prevent duplicate messages
-    __table_args__ = (db.UniqueConstraint('campaign_id', 'business_id', 'contact_id', 'platform', name='unique_campaign_message'),)
+    # Unique constraint to prevent duplicate messages, and an index for status counts per campaign
+    __table_args__ = (
+        db.UniqueConstraint('campaign_id', 'business_id', 'contact_id', 'platform', name='unique_campaign_message'),
+        db.Index('ix_messages_campaign_status', 'campaign_id', 'status'),
+    )
     
     def __repr__(self):
         return f'<Message {self.id}: {self.platform} to {self.business.name}>'
@@ -128,3 +145,27 @@ class Message(db.Model):
             'replied_at': self.replied_at.isoformat() if self.replied_at else None
         }
 
+class MessageDailyRollup(db.Model):
+    __tablename__ = 'message_daily_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False)
+    platform = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(50), nullable=False)  # sent, failed, opened, replied
+    count = db.Column(db.Integer, nullable=False, default=0)  # Messages that reached the status that day
+    
+    # One counter per day, campaign, platform and status
+    __table_args__ = (db.UniqueConstraint('day', 'campaign_id', 'platform', 'status', name='unique_message_rollup'),)
+    
+    def __repr__(self):
+        return f'<MessageDailyRollup {self.day} {self.campaign_id} {self.platform} {self.status}: {self.count}>'
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'campaign_id': self.campaign_id,
+            'platform': self.platform,
+            'status': self.status,
+            'count': self.count
+        }
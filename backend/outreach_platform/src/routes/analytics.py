@@ -1,84 +1,58 @@
-from flask import Blueprint, request, jsonify, make_response
-from src.models.business import db, Business, Contact, Campaign, Message
-from datetime import datetime, timedelta
-import csv
-import io
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.models.business import db, Business, Contact, Campaign
+from src.services.stats import get_business_status_counts, get_campaign_message_totals, get_contact_coverage
+from src.services.exports import (
+    CAMPAIGN_EXPORT_HEADER, MESSAGE_EXPORT_HEADER, iter_csv, iter_campaign_export_rows, iter_message_export_rows
+)
+from src.services.response_cache import cached_response
+from src.services.rollups import GRANULARITIES, get_message_timeseries
+from datetime import date, datetime, timedelta
 
 analytics_bp = Blueprint('analytics', __name__)
 
 @analytics_bp.route('/analytics/export', methods=['GET'])
 def export_analytics():
-    """Export analytics data as CSV"""
+    """Export analytics data as CSV, streamed row by row"""
     try:
         # Get query parameters
         format_type = request.args.get('format', 'csv')
+        level = request.args.get('level', 'campaigns')
         date_range = request.args.get('date_range', '30')  # days
         
+        if format_type != 'csv':
+            return jsonify({'error': 'Unsupported format'}), 400
+        
         # Calculate date filter
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=int(date_range))
         
-        # Get campaigns data
-        campaigns = Campaign.query.filter(
-            Campaign.created_at >= start_date
-        ).all()
+        if level == 'campaigns':
+            rows = iter_campaign_export_rows(start_date)
+            header = CAMPAIGN_EXPORT_HEADER
+            filename = 'analytics_export'
+        elif level == 'messages':
+            rows = iter_message_export_rows(
+                start_date,
+                campaign_id=request.args.get('campaign_id', type=int),
+                status=request.args.get('status'),
+                platform=request.args.get('platform')
+            )
+            header = MESSAGE_EXPORT_HEADER
+            filename = 'analytics_messages_export'
+        else:
+            return jsonify({'error': "Invalid level. Must be one of: ['campaigns', 'messages']"}), 400
         
-        if format_type == 'csv':
-            # Create CSV data
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write headers
-            writer.writerow([
-                'Campaign Name',
-                'Status',
-                'Created Date',
-                'Total Messages',
-                'Sent Messages',
-                'Failed Messages',
-                'Opened Messages',
-                'Replied Messages',
-                'Success Rate (%)'
-            ])
-            
-            # Write campaign data
-            for campaign in campaigns:
-                # Get message statistics
-                total_messages = Message.query.filter_by(campaign_id=campaign.id).count()
-                sent_messages = Message.query.filter_by(campaign_id=campaign.id, status='sent').count()
-                failed_messages = Message.query.filter_by(campaign_id=campaign.id, status='failed').count()
-                opened_messages = Message.query.filter_by(campaign_id=campaign.id, status='opened').count()
-                replied_messages = Message.query.filter_by(campaign_id=campaign.id, status='replied').count()
-                
-                success_rate = round((sent_messages / total_messages * 100), 2) if total_messages > 0 else 0
-                
-                writer.writerow([
-                    campaign.name,
-                    campaign.status,
-                    campaign.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    total_messages,
-                    sent_messages,
-                    failed_messages,
-                    opened_messages,
-                    replied_messages,
-                    success_rate
-                ])
-            
-            # Create response
-            output.seek(0)
-            response = make_response(output.getvalue())
-            response.headers['Content-Type'] = 'text/csv'
-            response.headers['Content-Disposition'] = f'attachment; filename=analytics_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-            
-            return response
+        # Rows are queried and written as the response is sent
+        response = Response(stream_with_context(iter_csv(header, rows)), mimetype='text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
         
-        else:
-            return jsonify({'error': 'Unsupported format'}), 400
+        return response
             
     except Exception as e:
         return jsonify({'error': f'Export failed: {str(e)}'}), 500
 
 @analytics_bp.route('/analytics/summary', methods=['GET'])
+@cached_response()
 def get_analytics_summary():
     """Get analytics summary data"""
     try:
@@ -91,20 +65,20 @@ def get_analytics_summary():
         
         # Get basic counts
         total_businesses = Business.query.count()
-        total_campaigns = Campaign.query.filter(
+        campaigns = db.session.query(Campaign.id, Campaign.name).filter(
             Campaign.created_at >= start_date
-        ).count()
+        ).order_by(Campaign.id).all()
+        total_campaigns = len(campaigns)
         
-        # Get message statistics
-        messages_query = Message.query.join(Campaign).filter(
-            Campaign.created_at >= start_date
-        )
+        # Message statistics per campaign, from one grouped query
+        campaign_totals = get_campaign_message_totals(start_date)
+        empty_totals = {'total': 0, 'sent': 0, 'failed': 0, 'opened': 0, 'replied': 0}
         
-        total_messages = messages_query.count()
-        sent_messages = messages_query.filter(Message.status == 'sent').count()
-        failed_messages = messages_query.filter(Message.status == 'failed').count()
-        opened_messages = messages_query.filter(Message.status == 'opened').count()
-        replied_messages = messages_query.filter(Message.status == 'replied').count()
+        total_messages = sum(totals['total'] for totals in campaign_totals.values())
+        sent_messages = sum(totals['sent'] for totals in campaign_totals.values())
+        failed_messages = sum(totals['failed'] for totals in campaign_totals.values())
+        opened_messages = sum(totals['opened'] for totals in campaign_totals.values())
+        replied_messages = sum(totals['replied'] for totals in campaign_totals.values())
         
         # Calculate rates
         success_rate = round((sent_messages / total_messages * 100), 2) if total_messages > 0 else 0
@@ -112,44 +86,25 @@ def get_analytics_summary():
         reply_rate = round((replied_messages / sent_messages * 100), 2) if sent_messages > 0 else 0
         
         # Get campaign performance data
-        campaigns = Campaign.query.filter(
-            Campaign.created_at >= start_date
-        ).all()
-        
         campaign_performance = []
-        for campaign in campaigns:
-            campaign_messages = Message.query.filter_by(campaign_id=campaign.id)
-            campaign_total = campaign_messages.count()
-            campaign_sent = campaign_messages.filter_by(status='sent').count()
-            campaign_opened = campaign_messages.filter_by(status='opened').count()
-            campaign_replied = campaign_messages.filter_by(status='replied').count()
+        for campaign_id, campaign_name in campaigns:
+            totals = campaign_totals.get(campaign_id, empty_totals)
             
             campaign_performance.append({
-                'name': campaign.name,
-                'total': campaign_total,
-                'sent': campaign_sent,
-                'opened': campaign_opened,
-                'replied': campaign_replied,
-                'success_rate': round((campaign_sent / campaign_total * 100), 2) if campaign_total > 0 else 0
+                'name': campaign_name,
+                'total': totals['total'],
+                'sent': totals['sent'],
+                'opened': totals['opened'],
+                'replied': totals['replied'],
+                'success_rate': round((totals['sent'] / totals['total'] * 100), 2) if totals['total'] > 0 else 0
             })
         
-        # Get daily performance data (last 7 days)
-        daily_performance = []
-        for i in range(7):
-            day_start = end_date - timedelta(days=i+1)
-            day_end = end_date - timedelta(days=i)
-            
-            day_messages = Message.query.join(Campaign).filter(
-                Message.sent_at >= day_start,
-                Message.sent_at < day_end
-            ).count()
-            
-            daily_performance.append({
-                'date': day_start.strftime('%Y-%m-%d'),
-                'messages': day_messages
-            })
-        
-        daily_performance.reverse()  # Show oldest to newest
+        # Get daily performance data (last 7 days, oldest to newest) from the rollups
+        today = end_date.date()
+        daily_performance = [
+            {'date': point['period'], 'messages': point['sent']}
+            for point in get_message_timeseries(today - timedelta(days=6), today, statuses=('sent',))
+        ]
         
         return jsonify({
             'summary': {
@@ -176,15 +131,54 @@ def get_analytics_summary():
     except Exception as e:
         return jsonify({'error': f'Failed to get analytics summary: {str(e)}'}), 500
 
+@analytics_bp.route('/analytics/timeseries', methods=['GET'])
+def get_analytics_timeseries():
+    """Get message counts per period and status over a date range"""
+    try:
+        # Get query parameters
+        granularity = request.args.get('granularity', 'day')
+        date_range = request.args.get('date_range', '30')  # days
+        campaign_id = request.args.get('campaign_id', type=int)
+        platform = request.args.get('platform')
+        
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': f'Invalid granularity. Must be one of: {list(GRANULARITIES)}'}), 400
+        
+        # Explicit dates take precedence over the date range
+        try:
+            end_day = date.fromisoformat(request.args['end']) if 'end' in request.args else datetime.utcnow().date()
+            start_day = (
+                date.fromisoformat(request.args['start']) if 'start' in request.args
+                else end_day - timedelta(days=int(date_range) - 1)
+            )
+        except ValueError:
+            return jsonify({'error': 'Dates must be formatted as YYYY-MM-DD'}), 400
+        
+        if start_day > end_day:
+            return jsonify({'error': 'start must not be after end'}), 400
+        
+        series = get_message_timeseries(start_day, end_day, granularity, campaign_id, platform)
+        
+        return jsonify({
+            'series': series,
+            'granularity': granularity,
+            'date_range': {
+                'start': start_day.isoformat(),
+                'end': end_day.isoformat()
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to get analytics timeseries: {str(e)}'}), 500
+
 @analytics_bp.route('/analytics/business-stats', methods=['GET'])
+@cached_response()
 def get_business_stats():
     """Get business-related statistics"""
     try:
         # Business status distribution
-        total_businesses = Business.query.count()
-        pending_scan = Business.query.filter_by(status='pending_scan').count()
-        scanned = Business.query.filter_by(status='scanned').count()
-        active = Business.query.filter_by(status='active').count()
+        status_counts = get_business_status_counts()
+        total_businesses = sum(status_counts.values())
         
         # Contact type distribution
         contact_types = db.session.query(
@@ -197,23 +191,13 @@ def get_business_stats():
             for contact_type, count in contact_types
         ]
         
-        # Businesses with contacts
-        businesses_with_contacts = db.session.query(Business.id).join(Contact).distinct().count()
-        businesses_without_contacts = total_businesses - businesses_with_contacts
-        
         return jsonify({
             'business_status': {
                 'total': total_businesses,
-                'pending_scan': pending_scan,
-                'scanned': scanned,
-                'active': active
+                **status_counts
             },
             'contact_distribution': contact_distribution,
-            'contact_coverage': {
-                'with_contacts': businesses_with_contacts,
-                'without_contacts': businesses_without_contacts,
-                'coverage_rate': round((businesses_with_contacts / total_businesses * 100), 2) if total_businesses > 0 else 0
-            }
+            'contact_coverage': get_contact_coverage(total_businesses)
         })
         
     except Exception as e:
@@ -1,9 +1,12 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 import csv
-import io
 import os
+import uuid
 from src.models.business import db, Business, Contact
+from src.services.response_cache import invalidate_cached_responses
+from src.tasks.celery_app import run_in_request
+from src.tasks.csv_processor import open_csv_reader, get_upload_folder, process_csv_sync, process_csv_task
 
 business_bp = Blueprint('business', __name__)
 
@@ -12,83 +15,6 @@ ALLOWED_EXTENSIONS = {'csv'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def process_csv_sync(csv_data):
-    """Process CSV data synchronously"""
-    processed_count = 0
-    error_count = 0
-    errors = []
-    
-    for i, row in enumerate(csv_data):
-        try:
-            # Extract business data from CSV row
-            business_name = row.get('Business Name', '').strip()
-            if not business_name:
-                error_count += 1
-                errors.append(f"Row {i+1}: Missing business name")
-                continue
-            
-            # Check if business already exists
-            existing_business = Business.query.filter_by(name=business_name).first()
-            if existing_business:
-                continue
-            
-            # Create new business
-            business = Business(
-                name=business_name,
-                website=row.get('Website', '').strip() or None,
-                email=row.get('Email', '').strip() or None,
-                phone_number=row.get('Phone Number', '').strip() or None,
-                address=row.get('Address', '').strip() or None,
-                status='pending_scan'
-            )
-            
-            db.session.add(business)
-            db.session.flush()  # Get the business ID
-            
-            # Create contacts from CSV data
-            contacts_created = 0
-            
-            # Add email contact if provided
-            if business.email:
-                email_contact = Contact(
-                    business_id=business.id,
-                    type='email',
-                    value=business.email,
-                    source='csv',
-                    is_primary=True
-                )
-                db.session.add(email_contact)
-                contacts_created += 1
-            
-            # Add phone contact if provided
-            if business.phone_number:
-                phone_contact = Contact(
-                    business_id=business.id,
-                    type='phone',
-                    value=business.phone_number,
-                    source='csv',
-                    is_primary=True
-                )
-                db.session.add(phone_contact)
-                contacts_created += 1
-            
-            db.session.commit()
-            processed_count += 1
-            
-        except Exception as e:
-            db.session.rollback()
-            error_count += 1
-            error_msg = f"Row {i+1}: {str(e)}"
-            errors.append(error_msg)
-    
-    return {
-        'total_rows': len(csv_data),
-        'processed': processed_count,
-        'errors': error_count,
-        'error_details': errors[:10],  # Limit error details to first 10
-        'status': 'completed'
-    }
-
 @business_bp.route('/businesses/upload', methods=['POST'])
 def upload_csv():
     """Upload and process CSV file containing business data"""
@@ -102,31 +28,77 @@ def upload_csv():
     if not allowed_file(file.filename):
         return jsonify({'error': 'Invalid file type. Only CSV files are allowed.'}), 400
     
+    required_headers = ['Business Name']
+    optional_headers = ['Website', 'Email', 'Phone Number', 'Address']
+    
+    # Process in the request when asked to, and by default without a worker
+    if run_in_request(request.args.get('sync')):
+        return import_csv_upload(file, required_headers)
+    
     try:
-        # Read CSV content
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_input = csv.DictReader(stream)
+        # Spool the upload to disk for the background import
+        file_path = os.path.join(get_upload_folder(), f'{uuid.uuid4().hex}_{secure_filename(file.filename)}')
+        file.save(file_path)
+        
+        with open(file_path, 'rb') as f:
+            csv_input = open_csv_reader(f)
+            
+            # Validate CSV headers
+            try:
+                if not csv_input.fieldnames or not all(header in csv_input.fieldnames for header in required_headers):
+                    error = f'CSV must contain required headers: {required_headers}'
+                elif next(csv_input, None) is None:
+                    error = 'CSV file is empty'
+                else:
+                    error = None
+            except (UnicodeDecodeError, csv.Error) as e:
+                error = f'CSV file could not be read: {str(e)}'
+        
+        if error:
+            os.remove(file_path)
+            return jsonify({'error': error}), 400
+        
+        task = process_csv_task.apply_async(args=[file_path])
+        
+        return jsonify({
+            'message': 'CSV import queued.',
+            'task_id': task.id,
+            'status_url': f'/api/tasks/{task.id}/status'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': f'Error queueing CSV import: {str(e)}'}), 500
+
+def import_csv_upload(file, required_headers):
+    """Import an uploaded CSV file within the request"""
+    try:
+        # Decode and parse the upload lazily instead of reading it into memory
+        csv_input = open_csv_reader(file.stream)
         
         # Validate CSV headers
-        required_headers = ['Business Name']
-        optional_headers = ['Website', 'Email', 'Phone Number', 'Address']
+        try:
+            fieldnames = csv_input.fieldnames
+        except (UnicodeDecodeError, csv.Error) as e:
+            return jsonify({'error': f'CSV file could not be read: {str(e)}'}), 400
         
-        if not all(header in csv_input.fieldnames for header in required_headers):
+        if not fieldnames or not all(header in fieldnames for header in required_headers):
             return jsonify({'error': f'CSV must contain required headers: {required_headers}'}), 400
         
-        # Convert CSV to list for processing
-        csv_data = []
-        for row in csv_input:
-            csv_data.append(row)
+        # Rows are streamed into the importer in fixed-size batches
+        result = process_csv_sync(csv_input)
+        
+        if result['status'] == 'failed':
+            return jsonify({'error': 'CSV file could not be read', 'result': result}), 400
         
-        if not csv_data:
+        if result['total_rows'] == 0:
             return jsonify({'error': 'CSV file is empty'}), 400
         
-        # Process CSV synchronously
-        result = process_csv_sync(csv_data)
+        message = 'CSV processing completed.'
+        if result['status'] == 'partial':
+            message = 'CSV processing stopped at unreadable data.'
         
         return jsonify({
-            'message': 'CSV processing completed.',
+            'message': message,
             'result': result
         }), 200
         
@@ -194,6 +166,7 @@ def update_business(business_id):
     
     try:
         db.session.commit()
+        invalidate_cached_responses()
         return jsonify({
             'message': 'Business updated successfully.',
             'business': business.to_dict()
@@ -210,6 +183,7 @@ def delete_business(business_id):
     try:
         db.session.delete(business)
         db.session.commit()
+        invalidate_cached_responses()
         return '', 204
     except Exception as e:
         db.session.rollback()
@@ -249,6 +223,7 @@ def add_contact(business_id):
         
         db.session.add(contact)
         db.session.commit()
+        invalidate_cached_responses()
         
         return jsonify({
             'message': 'Contact added successfully.',
@@ -267,6 +242,7 @@ def delete_contact(business_id, contact_id):
     try:
         db.session.delete(contact)
         db.session.commit()
+        invalidate_cached_responses()
         return '', 204
     except Exception as e:
         db.session.rollback()
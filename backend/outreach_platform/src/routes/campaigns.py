@@ -1,10 +1,37 @@
 from flask import Blueprint, request, jsonify
 from src.models.business import db, Business, Contact, Campaign, Message
-from src.tasks.outreach import send_campaign_messages_sync, generate_personalized_message
+from src.services.response_cache import invalidate_cached_responses
+from src.services.stats import get_message_status_counts, build_messages_summary
+from src.tasks.celery_app import run_in_request
+from src.tasks.outreach import (
+    send_campaign_messages_sync, generate_personalized_message,
+    dispatch_campaign_send, finish_campaign_send, resume_campaign_send
+)
 from datetime import datetime
+import json
 
 campaigns_bp = Blueprint('campaigns', __name__)
 
+# Message fields that can be selected in message listings
+MESSAGE_FIELDS = {
+    'id': Message.id,
+    'business_id': Message.business_id,
+    'business_name': Business.name,
+    'contact_id': Message.contact_id,
+    'platform': Message.platform,
+    'status': Message.status,
+    'sent_at': Message.sent_at,
+    'opened_at': Message.opened_at,
+    'replied_at': Message.replied_at,
+    'personalized_content': Message.personalized_content
+}
+
+# Listed by default; the content of a message is fetched on demand
+DEFAULT_MESSAGE_FIELDS = [field for field in MESSAGE_FIELDS if field != 'personalized_content']
+
+# Largest page of messages returned at once
+MAX_MESSAGES_PER_PAGE = 500
+
 @campaigns_bp.route('/campaigns', methods=['POST'])
 def create_campaign():
     """Create a new outreach campaign"""
@@ -31,6 +58,7 @@ def create_campaign():
         
         db.session.add(campaign)
         db.session.commit()
+        invalidate_cached_responses()
         
         return jsonify({
             'message': 'Campaign created successfully.',
@@ -61,26 +89,13 @@ def get_campaigns():
         error_out=False
     )
     
-    # Add message statistics for each campaign
+    # Message statistics for the whole page come from one grouped query
+    status_counts = get_message_status_counts([campaign.id for campaign in campaigns.items])
+    
     campaign_list = []
     for campaign in campaigns.items:
         campaign_dict = campaign.to_dict()
-        
-        # Get message statistics
-        total_messages = Message.query.filter_by(campaign_id=campaign.id).count()
-        sent_messages = Message.query.filter_by(campaign_id=campaign.id, status='sent').count()
-        failed_messages = Message.query.filter_by(campaign_id=campaign.id, status='failed').count()
-        opened_messages = Message.query.filter_by(campaign_id=campaign.id, status='opened').count()
-        replied_messages = Message.query.filter_by(campaign_id=campaign.id, status='replied').count()
-        
-        campaign_dict['messages_summary'] = {
-            'total': total_messages,
-            'sent': sent_messages,
-            'failed': failed_messages,
-            'opened': opened_messages,
-            'replied': replied_messages
-        }
-        
+        campaign_dict['messages_summary'] = build_messages_summary(status_counts[campaign.id])
         campaign_list.append(campaign_dict)
     
     return jsonify({
@@ -99,27 +114,73 @@ def get_campaign(campaign_id):
     
     campaign_dict = campaign.to_dict()
     
-    # Get detailed message information
-    messages = Message.query.filter_by(campaign_id=campaign_id).all()
-    campaign_dict['messages'] = [message.to_dict() for message in messages]
+    # Messages are listed separately, see get_campaign_messages
+    campaign_dict['messages_url'] = f'/api/campaigns/{campaign_id}/messages'
     
     # Get message statistics
-    total_messages = len(messages)
-    sent_messages = sum(1 for m in messages if m.status == 'sent')
-    failed_messages = sum(1 for m in messages if m.status == 'failed')
-    opened_messages = sum(1 for m in messages if m.status == 'opened')
-    replied_messages = sum(1 for m in messages if m.status == 'replied')
-    
-    campaign_dict['messages_summary'] = {
-        'total': total_messages,
-        'sent': sent_messages,
-        'failed': failed_messages,
-        'opened': opened_messages,
-        'replied': replied_messages
-    }
+    status_counts = get_message_status_counts([campaign_id])
+    campaign_dict['messages_summary'] = build_messages_summary(status_counts[campaign_id])
     
     return jsonify(campaign_dict)
 
+@campaigns_bp.route('/campaigns/<int:campaign_id>/messages', methods=['GET'])
+def get_campaign_messages(campaign_id):
+    """List the messages of a campaign a page at a time
+    
+    Pages are keyed on the message id: pass the next_after value of a page
+    as after to get the next one, which costs the same at any depth.
+    """
+    Campaign.query.get_or_404(campaign_id)
+    
+    after = request.args.get('after', 0, type=int)
+    limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_MESSAGES_PER_PAGE)
+    status = request.args.get('status')
+    platform = request.args.get('platform')
+    
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else DEFAULT_MESSAGE_FIELDS
+    unknown_fields = [field for field in fields if field not in MESSAGE_FIELDS]
+    if unknown_fields:
+        return jsonify({'error': f'Unknown fields: {unknown_fields}. Must be among: {list(MESSAGE_FIELDS)}'}), 400
+    
+    # The id is always selected to key the next page
+    selected_fields = [field for field in fields if field != 'id']
+    query = db.session.query(Message.id, *[MESSAGE_FIELDS[field] for field in selected_fields]).filter(
+        Message.campaign_id == campaign_id,
+        Message.id > after
+    )
+    
+    if 'business_name' in fields:
+        query = query.join(Business, Business.id == Message.business_id)
+    if status:
+        query = query.filter(Message.status == status)
+    if platform:
+        query = query.filter(Message.platform == platform)
+    
+    # Fetch one extra row to tell whether there is a next page
+    rows = query.order_by(Message.id).limit(limit + 1).all()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    
+    messages = []
+    for row in rows:
+        message = {'id': row[0]} if 'id' in fields else {}
+        for field, value in zip(selected_fields, row[1:]):
+            message[field] = value.isoformat() if isinstance(value, datetime) else value
+        messages.append(message)
+    
+    return jsonify({
+        'messages': messages,
+        'has_next': has_next,
+        'next_after': rows[-1][0] if has_next else None
+    })
+
+@campaigns_bp.route('/campaigns/<int:campaign_id>/messages/<int:message_id>', methods=['GET'])
+def get_campaign_message(campaign_id, message_id):
+    """Retrieve a single message of a campaign, including its content"""
+    message = Message.query.filter_by(id=message_id, campaign_id=campaign_id).first_or_404()
+    return jsonify(message.to_dict())
+
 @campaigns_bp.route('/campaigns/<int:campaign_id>', methods=['PUT'])
 def update_campaign(campaign_id):
     """Update campaign details"""
@@ -137,6 +198,7 @@ def update_campaign(campaign_id):
                 setattr(campaign, field, data[field])
         
         db.session.commit()
+        invalidate_cached_responses()
         
         return jsonify({
             'message': 'Campaign updated successfully.',
@@ -155,6 +217,7 @@ def delete_campaign(campaign_id):
     try:
         db.session.delete(campaign)
         db.session.commit()
+        invalidate_cached_responses()
         return '', 204
     except Exception as e:
         db.session.rollback()
@@ -162,7 +225,7 @@ def delete_campaign(campaign_id):
 
 @campaigns_bp.route('/campaigns/<int:campaign_id>/send', methods=['POST'])
 def send_campaign(campaign_id):
-    """Send messages for a campaign"""
+    """Queue sending the messages of a campaign"""
     campaign = Campaign.query.get_or_404(campaign_id)
     data = request.get_json() or {}
     
@@ -170,24 +233,50 @@ def send_campaign(campaign_id):
     business_ids = data.get('business_ids')  # If specified, only send to these businesses
     platforms = data.get('platforms', ['email'])  # Default to email only
     
+    if campaign.status == 'sending':
+        return jsonify({'error': 'Campaign is already sending'}), 400
+    
+    # Send within the request when asked to, and by default without a worker
+    if run_in_request(request.args.get('sync')):
+        return send_campaign_now(campaign, business_ids, platforms)
+    
     try:
         # Update campaign status
         campaign.status = 'sending'
         db.session.commit()
         
-        # Send messages
-        result = send_campaign_messages_sync(campaign_id, business_ids, platforms)
+        # The campaign is completed by the last task of the send
+        task_id = dispatch_campaign_send(campaign_id, business_ids, platforms)
         
-        # Update campaign status based on result
-        if result['success']:
-            campaign.status = 'completed' if result['sent_count'] > 0 else 'draft'
-        else:
-            campaign.status = 'draft'
+        return jsonify({
+            'message': 'Campaign sending initiated.',
+            'task_id': task_id,
+            'status_url': f'/api/tasks/{task_id}/status'
+        }), 202
         
+    except Exception as e:
+        # Reset campaign status on error
+        db.session.rollback()
+        campaign.status = 'draft'
         db.session.commit()
+        return jsonify({'error': f'Error queueing campaign: {str(e)}'}), 500
+
+def send_campaign_now(campaign, business_ids, platforms):
+    """Send the messages of a campaign within the request"""
+    try:
+        # Update campaign status
+        campaign.status = 'sending'
+        db.session.commit()
+        
+        # Send messages
+        result = send_campaign_messages_sync(campaign.id, business_ids, platforms)
         
+        # Update campaign status based on result, or checkpoint a pause
+        finish_campaign_send(campaign.id, result, platforms)
+        
+        state = 'paused' if result.get('paused') else 'completed'
         return jsonify({
-            'message': f'Campaign sending completed. Sent {result["sent_count"]} messages.',
+            'message': f'Campaign sending {state}. Sent {result.get("sent_count", 0)} messages.',
             'result': result
         }), 200
         
@@ -222,11 +311,26 @@ def resume_campaign(campaign_id):
     if campaign.status != 'paused':
         return jsonify({'error': 'Campaign is not currently paused'}), 400
     
+    checkpoint = campaign.checkpoint
+    if checkpoint and run_in_request(request.args.get('sync')):
+        # Continue from the businesses the paused send did not reach
+        business_ids = json.loads(checkpoint.business_ids)
+        platforms = json.loads(checkpoint.platforms)
+        db.session.delete(checkpoint)
+        return send_campaign_now(campaign, business_ids, platforms)
+    
     try:
-        campaign.status = 'sending'
-        db.session.commit()
+        # Continue from the businesses the paused send did not reach
+        task_id = resume_campaign_send(campaign)
+        if campaign.status != 'sending':
+            return jsonify({'message': f'Campaign already finished sending and is {campaign.status}.'})
+        
+        response = {'message': 'Campaign resumed.'}
+        if task_id:
+            response['task_id'] = task_id
+            response['status_url'] = f'/api/tasks/{task_id}/status'
         
-        return jsonify({'message': 'Campaign resumed.'})
+        return jsonify(response)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Error resuming campaign: {str(e)}'}), 500
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from src.models.business import db, Business
+from src.services.response_cache import cached_response
+from src.services.stats import get_business_status_counts
 from src.tasks.scanner import scan_business_sync, scan_all_pending_sync
 
 scanner_bp = Blueprint('scanner', __name__)
@@ -54,20 +56,18 @@ def scan_all_pending():
         return jsonify({'error': f'Error scanning businesses: {str(e)}'}), 500
 
 @scanner_bp.route('/scan/status', methods=['GET'])
+@cached_response()
 def get_scan_status():
     """Get scanning status and statistics"""
     try:
-        total_businesses = Business.query.count()
-        pending_scan = Business.query.filter_by(status='pending_scan').count()
-        scanned = Business.query.filter_by(status='scanned').count()
-        active = Business.query.filter_by(status='active').count()
+        status_counts = get_business_status_counts()
+        total_businesses = sum(status_counts.values())
+        scanned_businesses = status_counts['scanned'] + status_counts['active']
         
         return jsonify({
             'total_businesses': total_businesses,
-            'pending_scan': pending_scan,
-            'scanned': scanned,
-            'active': active,
-            'scan_completion_rate': round((scanned + active) / total_businesses * 100, 2) if total_businesses > 0 else 0
+            **status_counts,
+            'scan_completion_rate': round(scanned_businesses / total_businesses * 100, 2) if total_businesses > 0 else 0
         }), 200
         
     except Exception as e:
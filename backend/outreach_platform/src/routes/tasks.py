@@ -8,13 +8,31 @@ def get_task_status(task_id):
     """Get the status of a Celery task"""
     task = celery.AsyncResult(task_id)
     
-    if task.state == 'PENDING':
+    # Fanned-out jobs save their chunk group under the id of their last task
+    group = celery.GroupResult.restore(task_id) if task.state == 'PENDING' else None
+    
+    if group is not None:
+        response = {
+            'state': 'PROGRESS',
+            'current': group.completed_count(),
+            'total': len(group.results),
+            'status': 'Running...'
+        }
+    elif task.state == 'PENDING':
         response = {
             'state': task.state,
             'current': 0,
             'total': 1,
             'status': 'Pending...'
         }
+    elif task.state == 'RETRY':
+        # Retried tasks store the error that made them retry as the task info
+        response = {
+            'state': task.state,
+            'current': 0,
+            'total': 1,
+            'status': f'Retrying after error: {str(task.info)}'
+        }
     elif task.state != 'FAILURE':
         response = {
             'state': task.state,
@@ -26,6 +44,9 @@ def get_task_status(task_id):
         }
         if 'result' in task.info:
             response['result'] = task.info['result']
+        elif task.state == 'SUCCESS':
+            # Finished tasks store their return value as the task info
+            response['result'] = task.info
     else:
         # Task failed
         response = {
@@ -0,0 +1,122 @@
+import csv
+import io
+from src.models.business import db, Business, Contact, Campaign, Message
+from src.services.stats import MESSAGE_SUMMARY_STATUSES
+
+# Rows fetched from the database and written out per chunk of an export
+EXPORT_CHUNK_ROWS = 1000
+
+CAMPAIGN_EXPORT_HEADER = [
+    'Campaign Name',
+    'Status',
+    'Created Date',
+    'Total Messages',
+    'Sent Messages',
+    'Failed Messages',
+    'Opened Messages',
+    'Replied Messages',
+    'Success Rate (%)'
+]
+
+MESSAGE_EXPORT_HEADER = [
+    'Message ID',
+    'Campaign ID',
+    'Campaign Name',
+    'Business ID',
+    'Business Name',
+    'Platform',
+    'Recipient',
+    'Status',
+    'Sent At',
+    'Opened At',
+    'Replied At'
+]
+
+def format_timestamp(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+def iter_csv(header, rows, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Encode rows as CSV, yielding the text in chunks of chunk_rows rows
+
+    Only one chunk is held in memory at a time, whatever the number of rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+def iter_campaign_export_rows(start_date):
+    """Message totals of every campaign created since start_date
+
+    One query grouped by campaign, with a conditional sum per status.
+    Campaigns without messages are included with zero counts.
+    """
+    columns = [db.func.count(Message.id)] + [
+        db.func.sum(db.case((Message.status == status, 1), else_=0))
+        for status in MESSAGE_SUMMARY_STATUSES
+    ]
+
+    rows = db.session.query(
+        Campaign.id, Campaign.name, Campaign.status, Campaign.created_at, *columns
+    ).outerjoin(
+        Message, Message.campaign_id == Campaign.id
+    ).filter(
+        Campaign.created_at >= start_date
+    ).group_by(
+        Campaign.id, Campaign.name, Campaign.status, Campaign.created_at
+    ).order_by(Campaign.id).yield_per(EXPORT_CHUNK_ROWS)
+
+    for _, name, status, created_at, total, *status_counts in rows:
+        sent, failed, opened, replied = (int(count or 0) for count in status_counts)
+        success_rate = round((sent / total * 100), 2) if total > 0 else 0
+        yield [name, status, format_timestamp(created_at), total, sent, failed, opened, replied, success_rate]
+
+def iter_message_export_rows(start_date=None, campaign_id=None, status=None, platform=None):
+    """One row per message, streamed from a server-side cursor
+
+    Without a campaign_id, covers the messages of campaigns created since
+    start_date. Rows are fetched EXPORT_CHUNK_ROWS at a time, so memory
+    use does not grow with the number of messages.
+    """
+    query = db.session.query(
+        Message.id,
+        Message.campaign_id,
+        Campaign.name,
+        Message.business_id,
+        Business.name,
+        Message.platform,
+        Contact.value,
+        Message.status,
+        Message.sent_at,
+        Message.opened_at,
+        Message.replied_at
+    ).join(
+        Campaign, Campaign.id == Message.campaign_id
+    ).join(
+        Business, Business.id == Message.business_id
+    ).join(
+        Contact, Contact.id == Message.contact_id
+    )
+
+    if campaign_id:
+        query = query.filter(Message.campaign_id == campaign_id)
+    elif start_date:
+        query = query.filter(Campaign.created_at >= start_date)
+    if status:
+        query = query.filter(Message.status == status)
+    if platform:
+        query = query.filter(Message.platform == platform)
+
+    # yield_per also asks the driver for a server-side cursor where it has one
+    rows = query.order_by(Message.id).yield_per(EXPORT_CHUNK_ROWS)
+
+    for *fields, sent_at, opened_at, replied_at in rows:
+        yield fields + [format_timestamp(sent_at), format_timestamp(opened_at), format_timestamp(replied_at)]
@@ -0,0 +1,189 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+import redis
+from flask import current_app, make_response, request
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached response is served for at most, even when nothing
+# invalidated it. 0 disables response caching.
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '60'))
+
+# Responses kept in memory by each process while Redis is unreachable
+LOCAL_CACHE_SIZE = 256
+
+# Seconds before trying Redis again after it failed
+REDIS_RETRY_INTERVAL = 30
+
+# Namespace of the dashboard statistics, which imports, scans and sends change
+DASHBOARD_NAMESPACE = 'dashboard'
+
+def get_version_key(namespace):
+    return f'response_cache:{namespace}:version'
+
+class LocalResponseCache:
+    """LRU cache of responses and namespace versions kept in this process"""
+
+    def __init__(self, size=LOCAL_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()  # key -> (value, expires_at)
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def get_version(self, namespace):
+        return self.versions.get(namespace, 0)
+
+    def bump_version(self, namespace):
+        with self.lock:
+            self.versions[namespace] = self.versions.get(namespace, 0) + 1
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+class RedisResponseCache:
+    """Responses and namespace versions kept in Redis, shared by every process"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get_version(self, namespace):
+        return int(self.client.get(get_version_key(namespace)) or 0)
+
+    def bump_version(self, namespace):
+        self.client.incr(get_version_key(namespace))
+
+    def get(self, key):
+        value = self.client.get(key)
+        return json.loads(value) if value else None
+
+    def set(self, key, value, ttl):
+        self.client.set(key, json.dumps(value), ex=ttl)
+
+class ResponseCache:
+    """Response cache in Redis when it is reachable, in this process otherwise
+
+    Keys include a version per namespace, so bumping the version
+    invalidates every response of the namespace at once and old entries
+    simply expire. Versions are bumped in both stores, but the in-process
+    fallback only sees bumps made by this process; writes made by other
+    processes reach it through the TTL.
+    """
+
+    def __init__(self):
+        self.local = LocalResponseCache()
+        self.redis = None
+        self.retry_at = 0
+
+    def get_backend(self):
+        if self.redis is None and time.monotonic() >= self.retry_at:
+            try:
+                client = redis.Redis.from_url(
+                    os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+                    socket_connect_timeout=1,
+                    socket_timeout=1
+                )
+                client.ping()
+                self.redis = RedisResponseCache(client)
+            except redis.RedisError as e:
+                self.disable_redis(e)
+
+        return self.redis or self.local
+
+    def disable_redis(self, error):
+        logger.warning(f"Redis unavailable, caching responses within this process only: {str(error)}")
+        self.redis = None
+        self.retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def call(self, method, *args):
+        """Call a method of the current backend, falling back on Redis errors"""
+        backend = self.get_backend()
+        try:
+            return getattr(backend, method)(*args)
+        except redis.RedisError as e:
+            self.disable_redis(e)
+            return getattr(self.local, method)(*args)
+
+    def get_key(self, namespace, path, args):
+        version = self.call('get_version', namespace)
+        return f'response_cache:{namespace}:{version}:{path}?{urlencode(sorted(args))}'
+
+    def get(self, key):
+        return self.call('get', key)
+
+    def set(self, key, value, ttl):
+        self.call('set', key, value, ttl)
+
+    def invalidate(self, namespace):
+        self.local.bump_version(namespace)
+        if self.get_backend() is not self.local:
+            self.call('bump_version', namespace)
+
+response_cache = ResponseCache()
+
+def invalidate_cached_responses(namespace=DASHBOARD_NAMESPACE):
+    """Drop the cached responses of a namespace, after its data changed"""
+    response_cache.invalidate(namespace)
+
+def cached_response(namespace=DASHBOARD_NAMESPACE, ttl=None):
+    """Cache successful responses of a GET view by path and query arguments
+
+    Responses carry an ETag of their body, and a request whose
+    If-None-Match matches it gets an empty 304 Not Modified, so clients
+    polling unchanged data neither rerun the view nor download the body.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            entry_ttl = RESPONSE_CACHE_TTL if ttl is None else ttl
+            if entry_ttl <= 0:
+                return view(*args, **kwargs)
+
+            key = response_cache.get_key(namespace, request.path, request.args.items(multi=True))
+            entry = response_cache.get(key)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+                body = response.get_data(as_text=True)
+                entry = {
+                    'body': body,
+                    'mimetype': response.mimetype,
+                    'etag': hashlib.sha1(body.encode('utf-8')).hexdigest()
+                }
+                response_cache.set(key, entry, entry_ttl)
+
+            response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+            response.set_etag(entry['etag'])
+
+            # Clients revalidate on every poll rather than reuse their copy
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+
+        return wrapper
+    return decorator
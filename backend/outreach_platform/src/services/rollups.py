@@ -0,0 +1,154 @@
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from src.models.business import db, Message, MessageDailyRollup
+from src.models.bulk import increment_counts, replace_counts
+
+# Statuses whose day can be recomputed from a message timestamp
+TIMESTAMPED_STATUSES = {
+    'sent': Message.sent_at,
+    'opened': Message.opened_at,
+    'replied': Message.replied_at
+}
+
+# Statuses counted in the rollups
+ROLLUP_STATUSES = ('sent', 'failed', 'opened', 'replied')
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Days rebuilt per transaction when backfilling
+BACKFILL_WINDOW_DAYS = 31
+
+# Columns identifying a rollup counter
+ROLLUP_KEYS = ['day', 'campaign_id', 'platform', 'status']
+
+def record_message_events(events):
+    """Count status transitions in the rollups
+
+    events are (day, campaign_id, platform, status) tuples, one per message
+    that reached the status. They are added within the caller's
+    transaction, so they commit together with the status changes.
+    """
+    counts = Counter(events)
+    increment_counts(
+        MessageDailyRollup,
+        [{
+            'day': day,
+            'campaign_id': campaign_id,
+            'platform': platform,
+            'status': status,
+            'count': count
+        } for (day, campaign_id, platform, status), count in counts.items()],
+        keys=ROLLUP_KEYS
+    )
+
+def rebuild_rollups(start_day, end_day):
+    """Recompute the timestamped statuses of a range of days from the messages
+
+    Catches up on transitions written outside the send pipeline, such as
+    opens and replies. Failed sends carry no timestamp, so their counts
+    are only ever recorded as they happen and are left alone here.
+
+    The counters are overwritten with upserts rather than inserted, since
+    a send may record an event in the range after the old counters are
+    deleted.
+    """
+    start = datetime.combine(start_day, time.min)
+    end = datetime.combine(end_day + timedelta(days=1), time.min)
+    MessageDailyRollup.query.filter(
+        MessageDailyRollup.day >= start_day,
+        MessageDailyRollup.day <= end_day,
+        MessageDailyRollup.status.in_(TIMESTAMPED_STATUSES)
+    ).delete(synchronize_session=False)
+
+    rows = []
+    for status, timestamp in TIMESTAMPED_STATUSES.items():
+        day = db.func.date(timestamp)
+        counts = db.session.query(day, Message.campaign_id, Message.platform, db.func.count(Message.id)).filter(
+            timestamp >= start,
+            timestamp < end
+        ).group_by(day, Message.campaign_id, Message.platform)
+
+        for message_day, campaign_id, platform, count in counts:
+            # Depending on the database, date() gives a date or an ISO string
+            if isinstance(message_day, str):
+                message_day = date.fromisoformat(message_day)
+            rows.append({
+                'day': message_day,
+                'campaign_id': campaign_id,
+                'platform': platform,
+                'status': status,
+                'count': count
+            })
+
+    replace_counts(MessageDailyRollup, rows, keys=ROLLUP_KEYS)
+    db.session.commit()
+    return len(rows)
+
+def get_first_message_day():
+    """Day of the oldest message timestamp, or None if no message has one"""
+    firsts = [db.session.query(db.func.min(timestamp)).scalar() for timestamp in TIMESTAMPED_STATUSES.values()]
+    firsts = [first for first in firsts if first]
+    return min(firsts).date() if firsts else None
+
+def backfill_rollups(start_day=None, end_day=None):
+    """Rebuild the rollups of a range of days, by default of every message
+    
+    Runs rebuild_rollups over windows of BACKFILL_WINDOW_DAYS days, each in
+    its own transaction. Failed sends carry no timestamp, so they cannot be
+    backfilled and are only counted from when the rollups were introduced.
+    """
+    end_day = end_day or datetime.utcnow().date()
+    start_day = start_day or get_first_message_day()
+    if start_day is None:
+        return 0
+    
+    rows = 0
+    while start_day <= end_day:
+        window_end = min(end_day, start_day + timedelta(days=BACKFILL_WINDOW_DAYS - 1))
+        rows += rebuild_rollups(start_day, window_end)
+        start_day = window_end + timedelta(days=1)
+    return rows
+
+def get_period_start(day, granularity):
+    """First day of the period a day falls in"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+def get_message_timeseries(start_day, end_day, granularity='day', campaign_id=None, platform=None, statuses=ROLLUP_STATUSES):
+    """Message counts per period and status from the rollups
+
+    Returns [{'period': 'YYYY-MM-DD', <status>: count, ...}] for every
+    period overlapping the range, oldest first. Periods are labelled with
+    their first day; weeks start on Monday.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}'. Must be one of: {list(GRANULARITIES)}")
+
+    query = db.session.query(
+        MessageDailyRollup.day,
+        MessageDailyRollup.status,
+        db.func.sum(MessageDailyRollup.count)
+    ).filter(
+        MessageDailyRollup.day >= start_day,
+        MessageDailyRollup.day <= end_day,
+        MessageDailyRollup.status.in_(statuses)
+    )
+    if campaign_id:
+        query = query.filter(MessageDailyRollup.campaign_id == campaign_id)
+    if platform:
+        query = query.filter(MessageDailyRollup.platform == platform)
+
+    series = {}
+    day = start_day
+    while day <= end_day:
+        period = get_period_start(day, granularity)
+        series.setdefault(period, dict.fromkeys(statuses, 0))
+        day += timedelta(days=1)
+
+    for day, status, count in query.group_by(MessageDailyRollup.day, MessageDailyRollup.status):
+        series[get_period_start(day, granularity)][status] += int(count)
+
+    return [dict(counts, period=period.isoformat()) for period, counts in sorted(series.items())]
@@ -0,0 +1,82 @@
+from src.models.business import db, Business, Contact, Campaign, Message
+
+# Message statuses broken out in campaign summaries
+MESSAGE_SUMMARY_STATUSES = ('sent', 'failed', 'opened', 'replied')
+
+# Business statuses reported even when no business has them
+BUSINESS_STATUSES = ('pending_scan', 'scanned', 'active')
+
+def get_message_status_counts(campaign_ids):
+    """Message counts per status for each campaign, from one grouped query
+
+    Returns {campaign_id: {status: count}} with an entry for every id.
+    """
+    counts = {campaign_id: {} for campaign_id in campaign_ids}
+    if not counts:
+        return counts
+
+    rows = db.session.query(
+        Message.campaign_id,
+        Message.status,
+        db.func.count(Message.id)
+    ).filter(
+        Message.campaign_id.in_(counts)
+    ).group_by(Message.campaign_id, Message.status)
+
+    for campaign_id, status, count in rows:
+        counts[campaign_id][status] = count
+
+    return counts
+
+def build_messages_summary(status_counts):
+    """messages_summary of a campaign from its counts per status"""
+    summary = {'total': sum(status_counts.values())}
+    for status in MESSAGE_SUMMARY_STATUSES:
+        summary[status] = status_counts.get(status, 0)
+    return summary
+
+def get_campaign_message_totals(start_date):
+    """Message totals per status of the campaigns created since start_date
+
+    One query with a conditional sum per status, grouped by campaign.
+    Returns {campaign_id: {'total': ..., 'sent': ..., ...}} for campaigns
+    that have messages.
+    """
+    columns = [db.func.count(Message.id)] + [
+        db.func.sum(db.case((Message.status == status, 1), else_=0))
+        for status in MESSAGE_SUMMARY_STATUSES
+    ]
+
+    rows = db.session.query(Message.campaign_id, *columns).join(
+        Campaign, Campaign.id == Message.campaign_id
+    ).filter(
+        Campaign.created_at >= start_date
+    ).group_by(Message.campaign_id)
+
+    totals = {}
+    for campaign_id, total, *status_counts in rows:
+        totals[campaign_id] = dict(zip(MESSAGE_SUMMARY_STATUSES, (int(count or 0) for count in status_counts)))
+        totals[campaign_id]['total'] = total
+
+    return totals
+
+def get_business_status_counts():
+    """Business counts per status from one grouped query
+
+    Returns {status: count} with every status in BUSINESS_STATUSES, plus
+    any other status businesses have.
+    """
+    counts = dict.fromkeys(BUSINESS_STATUSES, 0)
+    rows = db.session.query(Business.status, db.func.count(Business.id)).group_by(Business.status)
+    for status, count in rows:
+        counts[status] = count
+    return counts
+
+def get_contact_coverage(total_businesses):
+    """How many businesses have at least one contact"""
+    with_contacts = db.session.query(db.func.count(db.distinct(Contact.business_id))).scalar() or 0
+    return {
+        'with_contacts': with_contacts,
+        'without_contacts': total_businesses - with_contacts,
+        'coverage_rate': round((with_contacts / total_businesses * 100), 2) if total_businesses > 0 else 0
+    }
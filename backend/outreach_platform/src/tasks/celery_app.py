@@ -1,6 +1,24 @@
 from celery import Celery
 import os
 
+def background_tasks_enabled():
+    """Whether a Celery worker is deployed to run background tasks
+    
+    Set BACKGROUND_TASKS=true once a worker consumes the task queues.
+    Until then, uploads and campaign sends run within the request.
+    """
+    return os.getenv('BACKGROUND_TASKS', 'false').lower() == 'true'
+
+def run_in_request(sync=None):
+    """Whether a job runs within the request rather than on a worker
+    
+    sync is the value of the request's sync query argument, if any. By
+    default jobs run on a worker only when background tasks are enabled.
+    """
+    if sync is None:
+        return not background_tasks_enabled()
+    return sync.lower() == 'true'
+
 def make_celery(app=None):
     """Create Celery instance"""
     celery = Celery(
@@ -22,6 +40,13 @@ def make_celery(app=None):
             'src.tasks.csv_processor.*': {'queue': 'csv_processing'},
             'src.tasks.scanner.*': {'queue': 'scanning'},
             'src.tasks.outreach.*': {'queue': 'outreach'},
+        },
+        beat_schedule={
+            # Catch the daily rollups up with opens and replies
+            'rebuild-message-rollups': {
+                'task': 'src.tasks.outreach.rebuild_message_rollups_task',
+                'schedule': float(os.getenv('ROLLUP_REBUILD_INTERVAL', '3600')),
+            },
         }
     )
     
@@ -1,118 +1,332 @@
 from src.tasks.celery_app import celery
+from src.tasks.progress import ProgressReporter
 from src.models.business import db, Business, Contact
+from src.services.response_cache import invalidate_cached_responses
+import csv
+import io
+import itertools
+import json
 import logging
+import os
+import tempfile
 
 logger = logging.getLogger(__name__)
 
-@celery.task(bind=True)
-def process_csv_task(self, csv_data):
-    """Process CSV data and create business records"""
-    try:
-        processed_count = 0
-        error_count = 0
-        errors = []
-        
-        total_rows = len(csv_data)
-        
-        for i, row in enumerate(csv_data):
+# Number of rows written per transaction
+DEFAULT_BATCH_SIZE = 500
+
+# Number of error messages kept in the result
+MAX_ERROR_DETAILS = 10
+
+# Times a failed background import is retried from its checkpoint, and
+# seconds between tries
+CSV_IMPORT_RETRIES = 3
+CSV_IMPORT_RETRY_DELAY = 60
+
+def open_csv_reader(binary_stream, encoding='utf-8-sig'):
+    """Wrap a binary stream in a DictReader that decodes and parses lazily"""
+    text_stream = io.TextIOWrapper(binary_stream, encoding=encoding, newline='')
+    return csv.DictReader(text_stream)
+
+def get_upload_folder():
+    """Directory where uploads are spooled for background import"""
+    folder = os.getenv('UPLOAD_FOLDER', os.path.join(tempfile.gettempdir(), 'outreach_uploads'))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+def count_csv_rows(file_path):
+    """Count the data rows of a spooled CSV file"""
+    with open(file_path, 'rb') as f:
+        return sum(1 for _ in open_csv_reader(f))
+
+class ImportCheckpoint:
+    """Import progress persisted next to the spooled CSV file"""
+
+    def __init__(self, file_path):
+        self.path = file_path + '.checkpoint'
+
+    def load(self):
+        """Return the saved state, or None if the import has not started"""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        """Atomically replace the saved state"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Remove the saved state"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+class CSVImporter:
+    """Bulk importer for business rows parsed from a CSV file"""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, progress_callback=None):
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+
+        self.total_rows = 0
+        self.processed_count = 0
+        self.skipped_count = 0
+        self.error_count = 0
+        self.errors = []
+        self.read_failed = False
+
+    def parse_row(self, row):
+        """Map a CSV row to Business column values"""
+        return {
+            'name': (row.get('Business Name') or '').strip(),
+            'website': (row.get('Website') or '').strip() or None,
+            'email': (row.get('Email') or '').strip() or None,
+            'phone_number': (row.get('Phone Number') or '').strip() or None,
+            'address': (row.get('Address') or '').strip() or None,
+            'status': 'pending_scan'
+        }
+
+    def record_error(self, row_number, message):
+        """Count an error and keep its details if there is room"""
+        self.error_count += 1
+        if len(self.errors) < MAX_ERROR_DETAILS:
+            self.errors.append(f"Row {row_number}: {message}")
+
+    def import_rows(self, rows):
+        """Import an iterable of CSV rows in chunks, one transaction per chunk
+
+        Rows are consumed lazily, so a streaming reader keeps memory bounded
+        by the batch size rather than the file size. A row that cannot be
+        decoded or parsed only surfaces once earlier chunks are committed,
+        so the import stops there and reports what it got through. The
+        cached responses are dropped once, after the last chunk or a failure.
+        """
+        processed_before = self.processed_count
+        try:
+            batch = []
+            for row in self.iter_readable_rows(rows):
+                self.total_rows += 1
+                batch.append((self.total_rows, row))
+
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch)
+                    batch = []
+
+            if batch:
+                self.import_batch(batch)
+        finally:
+            if self.processed_count > processed_before:
+                invalidate_cached_responses()
+
+        logger.info(
+            f"CSV import completed: {self.processed_count} processed, "
+            f"{self.skipped_count} skipped, {self.error_count} errors"
+        )
+        return self.get_result()
+
+    def iter_readable_rows(self, rows):
+        """Yield rows until the end of the file or one that cannot be read"""
+        rows = iter(rows)
+        while True:
             try:
-                # Update task progress
-                self.update_state(
-                    state='PROGRESS',
-                    meta={
-                        'current': i + 1,
-                        'total': total_rows,
-                        'processed': processed_count,
-                        'errors': error_count
-                    }
-                )
-                
-                # Extract business data from CSV row
-                business_name = row.get('Business Name', '').strip()
-                if not business_name:
-                    error_count += 1
-                    errors.append(f"Row {i+1}: Missing business name")
-                    continue
-                
-                # Check if business already exists
-                existing_business = Business.query.filter_by(name=business_name).first()
-                if existing_business:
-                    logger.info(f"Business '{business_name}' already exists, skipping")
-                    continue
-                
-                # Create new business
-                business = Business(
-                    name=business_name,
-                    website=row.get('Website', '').strip() or None,
-                    email=row.get('Email', '').strip() or None,
-                    phone_number=row.get('Phone Number', '').strip() or None,
-                    address=row.get('Address', '').strip() or None,
-                    status='pending_scan'
-                )
-                
-                db.session.add(business)
-                db.session.flush()  # Get the business ID
-                
-                # Create contacts from CSV data
-                contacts_created = 0
-                
-                # Add email contact if provided
-                if business.email:
-                    email_contact = Contact(
-                        business_id=business.id,
-                        type='email',
-                        value=business.email,
-                        source='csv',
-                        is_primary=True
-                    )
-                    db.session.add(email_contact)
-                    contacts_created += 1
-                
-                # Add phone contact if provided
-                if business.phone_number:
-                    phone_contact = Contact(
-                        business_id=business.id,
-                        type='phone',
-                        value=business.phone_number,
-                        source='csv',
-                        is_primary=True
-                    )
-                    db.session.add(phone_contact)
-                    contacts_created += 1
-                
+                row = next(rows)
+            except StopIteration:
+                return
+            except (UnicodeDecodeError, csv.Error) as e:
+                # Decoding runs ahead by a block, so the row is approximate
+                self.record_error(self.total_rows + 1, f"Unreadable data, import stopped: {str(e)}")
+                self.read_failed = True
+                return
+            yield row
+
+    def import_batch(self, batch):
+        """Validate, deduplicate and insert a chunk of numbered rows"""
+        pending = []
+        seen_names = set()
+        for row_number, row in batch:
+            values = self.parse_row(row)
+            name = values['name']
+
+            if not name:
+                self.record_error(row_number, "Missing business name")
+                continue
+
+            # Skip names repeated within the chunk. Repeats from earlier chunks
+            # are already committed and get caught by the lookup below.
+            if name in seen_names:
+                self.skipped_count += 1
+                continue
+
+            seen_names.add(name)
+            pending.append((row_number, values))
+
+        if pending:
+            # Preload the names of this chunk that already exist in one query
+            names = [values['name'] for _, values in pending]
+            existing_names = {
+                name for (name,) in db.session.query(Business.name).filter(Business.name.in_(names))
+            }
+
+            new_rows = [(row_number, values) for row_number, values in pending if values['name'] not in existing_names]
+            self.skipped_count += len(pending) - len(new_rows)
+
+            if new_rows:
+                self.insert_rows(new_rows)
+
+        if self.progress_callback:
+            self.progress_callback(self)
+
+    def insert_rows(self, rows):
+        """Insert a chunk of rows in one transaction, isolating failing rows"""
+        try:
+            self.bulk_insert([values for _, values in rows])
+            db.session.commit()
+            self.processed_count += len(rows)
+            return
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Bulk insert of {len(rows)} rows failed, retrying row by row: {str(e)}")
+
+        # Fall back to one transaction per row so errors can be attributed
+        for row_number, values in rows:
+            try:
+                self.bulk_insert([values])
                 db.session.commit()
-                processed_count += 1
-                
-                logger.info(f"Created business '{business_name}' with {contacts_created} contacts")
-                
+                self.processed_count += 1
             except Exception as e:
                 db.session.rollback()
-                error_count += 1
-                error_msg = f"Row {i+1}: {str(e)}"
-                errors.append(error_msg)
-                logger.error(error_msg)
-        
-        # Final result
-        result = {
-            'total_rows': total_rows,
-            'processed': processed_count,
-            'errors': error_count,
-            'error_details': errors[:10],  # Limit error details to first 10
-            'status': 'completed'
+                self.record_error(row_number, str(e))
+                logger.error(f"Row {row_number}: {str(e)}")
+
+    def bulk_insert(self, rows):
+        """Insert businesses and their CSV contacts with multi-row INSERTs"""
+        result = db.session.execute(
+            db.insert(Business).returning(Business.id, Business.name),
+            rows
+        )
+        business_ids = {name: business_id for business_id, name in result}
+
+        # Create contacts from CSV data
+        contacts = []
+        for values in rows:
+            business_id = business_ids[values['name']]
+
+            if values['email']:
+                contacts.append({
+                    'business_id': business_id,
+                    'type': 'email',
+                    'value': values['email'],
+                    'source': 'csv',
+                    'is_primary': True
+                })
+
+            if values['phone_number']:
+                contacts.append({
+                    'business_id': business_id,
+                    'type': 'phone',
+                    'value': values['phone_number'],
+                    'source': 'csv',
+                    'is_primary': True
+                })
+
+        if contacts:
+            db.session.execute(db.insert(Contact), contacts)
+
+    def get_state(self):
+        """Counters to checkpoint after a committed chunk"""
+        return {
+            'offset': self.total_rows,
+            'processed': self.processed_count,
+            'skipped': self.skipped_count,
+            'errors': self.error_count,
+            'error_details': self.errors
         }
-        
-        logger.info(f"CSV processing completed: {processed_count} processed, {error_count} errors")
-        return result
-        
-    except Exception as e:
-        logger.error(f"CSV processing failed: {str(e)}")
+
+    def restore(self, state):
+        """Continue counting from a checkpointed state"""
+        self.total_rows = state.get('offset', 0)
+        self.processed_count = state.get('processed', 0)
+        self.skipped_count = state.get('skipped', 0)
+        self.error_count = state.get('errors', 0)
+        self.errors = state.get('error_details', [])
+
+    def get_status(self):
+        """Whether the import read the whole file, or up to which point"""
+        if not self.read_failed:
+            return 'completed'
+        return 'partial' if self.processed_count else 'failed'
+
+    def get_result(self):
+        """Summary of the import so far"""
         return {
-            'status': 'failed',
-            'error': str(e),
-            'processed': processed_count,
-            'errors': error_count
+            'total_rows': self.total_rows,
+            'processed': self.processed_count,
+            'skipped': self.skipped_count,
+            'errors': self.error_count,
+            'error_details': self.errors,
+            'status': self.get_status()
         }
 
+@celery.task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=CSV_IMPORT_RETRIES)
+def process_csv_task(self, file_path):
+    """Import a spooled CSV file, resuming from its last checkpoint
+    
+    A failed import is retried from the checkpoint. Once the retries are
+    used up, the spooled file and its checkpoint are removed and the
+    error is raised, so the task ends in the FAILURE state.
+    """
+    checkpoint = ImportCheckpoint(file_path)
+    state = checkpoint.load() or {}
+
+    importer = CSVImporter()
+    importer.restore(state)
+
+    try:
+        total_rows = state.get('total') or count_csv_rows(file_path)
+        if importer.total_rows:
+            logger.info(f"Resuming CSV import of {file_path} after row {importer.total_rows}")
+
+        progress = ProgressReporter(self, total_rows)
+
+        def save_checkpoint(importer):
+            # Called after each chunk is committed
+            checkpoint.save(dict(importer.get_state(), total=total_rows))
+            progress.update(
+                importer.total_rows,
+                processed=importer.processed_count,
+                errors=importer.error_count
+            )
+
+        importer.progress_callback = save_checkpoint
+
+        with open(file_path, 'rb') as f:
+            rows = itertools.islice(open_csv_reader(f), importer.total_rows, None)
+            result = importer.import_rows(rows)
+
+        progress.flush()
+        checkpoint.clear()
+        os.remove(file_path)
+        return result
+
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            logger.warning(f"CSV processing of {file_path} failed, retrying from its checkpoint: {str(e)}")
+            raise self.retry(exc=e, countdown=CSV_IMPORT_RETRY_DELAY)
+        
+        logger.error(f"CSV processing failed after {importer.processed_count} rows: {str(e)}")
+        checkpoint.clear()
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        raise
+
 @celery.task
 def get_task_status(task_id):
     """Get the status of a task"""
@@ -142,3 +356,8 @@ def get_task_status(task_id):
         }
     return response
 
+# Synchronous function for immediate use
+def process_csv_sync(csv_data):
+    """Synchronously import CSV rows"""
+    importer = CSVImporter()
+    return importer.import_rows(csv_data)
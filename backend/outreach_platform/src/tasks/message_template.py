@@ -0,0 +1,100 @@
+import functools
+import operator
+import re
+
+# Placeholders available in campaign templates, with the business or
+# contact attribute each one is filled from
+BUSINESS_FIELDS = {
+    'business_name': 'name',
+    'website': 'website',
+    'email': 'email',
+    'phone': 'phone_number',
+    'address': 'address'
+}
+CONTACT_FIELDS = {
+    'contact_value': 'value',
+    'contact_type': 'type'
+}
+
+PLACEHOLDER_PATTERN = re.compile('{(' + '|'.join([*BUSINESS_FIELDS, *CONTACT_FIELDS]) + ')}')
+
+# Number of distinct renders memoized per template
+RENDER_CACHE_SIZE = 4096
+
+# Number of compiled templates kept around
+COMPILED_TEMPLATE_CACHE_SIZE = 128
+
+def tuple_getter(attributes):
+    """attrgetter that returns a tuple whatever the number of attributes"""
+    if not attributes:
+        return lambda obj: ()
+    if len(attributes) == 1:
+        getter = operator.attrgetter(attributes[0])
+        return lambda obj: (getter(obj),)
+    return operator.attrgetter(*attributes)
+
+class CompiledTemplate:
+    """A message template parsed into literal and field segments
+
+    Rendering fills the field segments and joins them in a single pass,
+    instead of one str.replace pass over the whole text per placeholder.
+    Values are inserted verbatim, so a value that itself looks like a
+    placeholder is left alone. Renders are memoized on the values of the
+    fields the template uses, so recipients that only differ in unused
+    fields share one rendered string.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+        # Odd positions of the split hold field names, even ones literals
+        self.segments = PLACEHOLDER_PATTERN.split(template)
+
+        # Fields used by the template, business ones first
+        used = set(self.segments[1::2])
+        business_fields = [field for field in BUSINESS_FIELDS if field in used]
+        contact_fields = [field for field in CONTACT_FIELDS if field in used]
+        self.fields = business_fields + contact_fields
+
+        self.get_business_values = tuple_getter([BUSINESS_FIELDS[field] for field in business_fields])
+        self.get_contact_values = tuple_getter([CONTACT_FIELDS[field] for field in contact_fields])
+
+        # (segment position, index of its value) for every placeholder
+        self.field_slots = [
+            (position, self.fields.index(self.segments[position]))
+            for position in range(1, len(self.segments), 2)
+        ]
+
+        self.cache = {}
+
+    def fill(self, values):
+        """Render the template from the values of self.fields"""
+        if not self.field_slots:
+            return self.template
+
+        segments = self.segments.copy()
+        for position, index in self.field_slots:
+            segments[position] = values[index]
+        return ''.join(segments)
+
+    def render(self, business, contact):
+        """Render the template for a business and one of its contacts"""
+        values = self.get_business_values(business) + self.get_contact_values(contact)
+        if None in values:
+            values = tuple([value or '' for value in values])
+
+        message = self.cache.get(values)
+        if message is None:
+            message = self.fill(values)
+
+            # Start over rather than track recency; sends walk businesses in order
+            if len(self.cache) >= RENDER_CACHE_SIZE:
+                self.cache.clear()
+            self.cache[values] = message
+
+        return message
+
+@functools.lru_cache(maxsize=COMPILED_TEMPLATE_CACHE_SIZE)
+def compile_template(template):
+    """Parse a template once and reuse the compiled form"""
+    return CompiledTemplate(template)
@@ -1,14 +1,165 @@
 import smtplib
+import json
 import logging
+import queue
+import threading
+import time
+import heapq
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime
-from src.models.business import db, Business, Contact, Campaign, Message
+from datetime import datetime, timedelta
+from celery import chord, group, uuid
+from src.tasks.celery_app import celery, run_in_request
+from src.tasks.message_template import compile_template
+from src.tasks.rate_limiter import RateLimiter, get_recipient_domain
+from src.services.rollups import record_message_events, rebuild_rollups, backfill_rollups
+from src.services.response_cache import invalidate_cached_responses
+from src.models.business import db, Business, Contact, Campaign, CampaignCheckpoint, Message
 import re
 import os
 
 logger = logging.getLogger(__name__)
 
+# Number of businesses handled per batch when sending a campaign
+SEND_BATCH_SIZE = 200
+
+# Number of businesses per task when a campaign send is fanned out
+SEND_CHUNK_SIZE = 1000
+
+# Seconds a send loop trusts its last read of the campaign status
+CONTROL_CHECK_INTERVAL = 2.0
+
+# Campaign statuses on which an in-flight send stops
+STOPPED_CAMPAIGN_STATUSES = {'paused', 'cancelled'}
+
+# Number of recent days the periodic rollup rebuild recomputes
+ROLLUP_REBUILD_DAYS = 7
+
+# Errors after which an SMTP session cannot be used any more
+SMTP_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+class SMTPConnectionPool:
+    """Pool of authenticated SMTP sessions reused across messages
+    
+    Opening a session costs a TCP connect, a STARTTLS handshake and a login,
+    so sessions are kept open and handed out to senders, at most size at a
+    time. When a session turns out to be dead the idle ones are dropped with
+    it and the message is sent again once over a fresh session.
+    """
+    
+    def __init__(self, host, port, username='', password='', use_tls=True, size=4, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+    
+    def connect(self):
+        """Open and authenticate a new SMTP session"""
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()  # Enable security
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self.close_quietly(server)
+            raise
+        return server
+    
+    def checkout(self):
+        """Take an idle session, or open one if none is idle"""
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        try:
+            return self.connect()
+        except Exception:
+            self.slots.release()
+            raise
+    
+    def checkin(self, server):
+        """Return a healthy session to the pool"""
+        self.idle.put(server)
+        self.slots.release()
+    
+    def discard(self, server):
+        """Drop a broken session"""
+        self.close_quietly(server)
+        self.slots.release()
+    
+    def close_quietly(self, server):
+        try:
+            server.quit()
+        except Exception:
+            try:
+                server.close()
+            except Exception:
+                pass
+    
+    def send_message(self, msg):
+        """Send a message over a pooled session, reconnecting once if it was dead"""
+        for attempt in range(2):
+            server = self.checkout()
+            try:
+                server.send_message(msg)
+            except SMTP_CONNECTION_ERRORS as e:
+                self.discard(server)
+                if attempt:
+                    raise
+                # Idle sessions opened alongside it are most likely dead too
+                self.close()
+                logger.info(f"SMTP session lost, reconnecting: {str(e)}")
+            except Exception:
+                # The session is still usable after e.g. a refused recipient
+                self.checkin(server)
+                raise
+            else:
+                self.checkin(server)
+                return
+    
+    def close(self):
+        """Close all idle sessions"""
+        while True:
+            try:
+                server = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            self.close_quietly(server)
+
+class CampaignControl:
+    """Cached view of whether a campaign send should keep going
+    
+    The send loop checks this between batches. The campaign status is read
+    from the database at most once per interval, so pausing takes effect
+    within seconds without a query per message.
+    """
+    
+    def __init__(self, campaign_id, interval=CONTROL_CHECK_INTERVAL):
+        self.campaign_id = campaign_id
+        self.interval = interval
+        self.status = None
+        self.checked_at = None
+    
+    def is_stopped(self):
+        """Whether the campaign was paused, cancelled or deleted"""
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= self.interval:
+            self.status = db.session.query(Campaign.status).filter(Campaign.id == self.campaign_id).scalar()
+            self.checked_at = now
+        
+        return self.status is None or self.status in STOPPED_CAMPAIGN_STATUSES
+
 class OutreachManager:
     """Manager for sending outreach messages via various platforms"""
     
@@ -20,26 +171,30 @@ class OutreachManager:
         self.smtp_password = os.getenv('SMTP_PASSWORD', '')
         self.from_email = os.getenv('FROM_EMAIL', self.smtp_username)
         
+        # Emails are only simulated unless SMTP delivery is enabled
+        self.smtp_enabled = os.getenv('SMTP_ENABLED', 'false').lower() == 'true'
+        self.smtp_pool = SMTPConnectionPool(
+            self.smtp_server,
+            self.smtp_port,
+            self.smtp_username,
+            self.smtp_password,
+            use_tls=os.getenv('SMTP_USE_TLS', 'true').lower() == 'true',
+            size=int(os.getenv('SMTP_POOL_SIZE', '4'))
+        )
+        self._rate_limiter = None
+    
+    @property
+    def rate_limiter(self):
+        """Rate limiter for outgoing messages, connected on first use"""
+        if self._rate_limiter is None:
+            self._rate_limiter = RateLimiter()
+        return self._rate_limiter
+        
     def generate_personalized_message(self, template, business, contact):
         """Generate personalized message from template"""
         try:
-            # Available placeholders
-            placeholders = {
-                '{business_name}': business.name or '',
-                '{website}': business.website or '',
-                '{email}': business.email or '',
-                '{phone}': business.phone_number or '',
-                '{address}': business.address or '',
-                '{contact_value}': contact.value or '',
-                '{contact_type}': contact.type or ''
-            }
-            
-            # Replace placeholders in template
-            personalized_message = template
-            for placeholder, value in placeholders.items():
-                personalized_message = personalized_message.replace(placeholder, value)
-            
-            return personalized_message
+            # Templates are parsed once and renders are memoized
+            return compile_template(template).render(business, contact)
             
         except Exception as e:
             logger.error(f"Error generating personalized message: {str(e)}")
@@ -57,20 +212,10 @@ class OutreachManager:
             # Add body to email
             msg.attach(MIMEText(message_content, 'plain'))
             
-            # For demo purposes, we'll simulate email sending
-            # In production, you would uncomment the SMTP code below
-            
-            # # Create SMTP session
-            # server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            # server.starttls()  # Enable security
-            # server.login(self.smtp_username, self.smtp_password)
-            # 
-            # # Send email
-            # text = msg.as_string()
-            # server.sendmail(self.from_email, to_email, text)
-            # server.quit()
+            # Send over a pooled SMTP session, or simulate for demo purposes
+            if self.smtp_enabled:
+                self.smtp_pool.send_message(msg)
             
-            # Simulate successful email sending
             logger.info(f"Email sent to {to_email} for business: {business_name}")
             return True, "Email sent successfully"
             
@@ -78,12 +223,74 @@ class OutreachManager:
             logger.error(f"Error sending email to {to_email}: {str(e)}")
             return False, str(e)
     
-    def generate_social_media_message(self, business, contact, message_template):
+    def send_emails(self, emails, should_stop=None):
+        """Send (to_email, subject, message_content, business_name) tuples in parallel
+        
+        One sender thread runs per pooled SMTP session. Results are returned
+        in the order of the input.
+        """
+        if not self.smtp_enabled:
+            return [self.send_email(*email) for email in emails]
+        
+        if self.rate_limiter.is_limited('email'):
+            return self.send_emails_paced(emails, should_stop)
+        
+        if len(emails) <= 1:
+            return [self.send_email(*email) for email in emails]
+        
+        with ThreadPoolExecutor(max_workers=self.smtp_pool.size) as executor:
+            return list(executor.map(lambda email: self.send_email(*email), emails))
+    
+    def send_emails_paced(self, emails, should_stop=None):
+        """Send emails in parallel within the rate limits
+        
+        Emails are queued per recipient domain. A domain whose bucket is
+        empty waits for it to refill while other domains go ahead, so the
+        limits slow a send down instead of failing messages. While waiting,
+        should_stop is polled; once it returns True no more emails are sent
+        and those left over get None as their result.
+        """
+        queues = defaultdict(deque)
+        for index, email in enumerate(emails):
+            queues[get_recipient_domain(email[0])].append(index)
+        
+        # Domains with queued emails, by the time their next email may go out
+        ready = [(0, domain) for domain in queues]
+        heapq.heapify(ready)
+        futures = [None] * len(emails)
+        
+        with ThreadPoolExecutor(max_workers=self.smtp_pool.size) as executor:
+            while ready:
+                now = time.monotonic()
+                ready_at, domain = ready[0]
+                if ready_at > now:
+                    if should_stop and should_stop():
+                        break
+                    time.sleep(ready_at - now)
+                    continue
+                
+                index = queues[domain][0]
+                wait = self.rate_limiter.acquire('email', self.from_email, emails[index][0])
+                if wait:
+                    heapq.heapreplace(ready, (now + wait, domain))
+                    continue
+                
+                queues[domain].popleft()
+                futures[index] = executor.submit(self.send_email, *emails[index])
+                if queues[domain]:
+                    heapq.heapreplace(ready, (now, domain))
+                else:
+                    heapq.heappop(ready)
+        
+        return [future.result() if future else None for future in futures]
+    
+    def generate_social_media_message(self, business, contact, message_template, personalized_message=None):
         """Generate social media message with instructions for manual sending"""
         try:
-            personalized_message = self.generate_personalized_message(
-                message_template, business, contact
-            )
+            if personalized_message is None:
+                personalized_message = self.generate_personalized_message(
+                    message_template, business, contact
+                )
             
             # Create instructions for manual sending
             platform = contact.type
@@ -103,8 +310,182 @@ class OutreachManager:
             logger.error(f"Error generating social media message: {str(e)}")
             return None
     
+    def iter_business_batches(self, business_ids=None):
+        """Yield the targeted businesses in batches ordered by id"""
+        if business_ids:
+            business_ids = sorted(set(business_ids))
+            for i in range(0, len(business_ids), SEND_BATCH_SIZE):
+                batch = Business.query.filter(
+                    Business.id.in_(business_ids[i:i + SEND_BATCH_SIZE])
+                ).order_by(Business.id).all()
+                if batch:
+                    yield batch
+            return
+        
+        last_id = 0
+        while True:
+            batch = Business.query.filter(
+                Business.id > last_id
+            ).order_by(Business.id).limit(SEND_BATCH_SIZE).all()
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+    
+    def prepare_batch(self, campaign, businesses, platforms):
+        """Render the messages a batch of businesses has not received yet
+        
+        Contacts and already existing messages for the whole batch are
+        loaded with one query each instead of one query per business.
+        """
+        business_ids = [business.id for business in businesses]
+        
+        # First contact of each business for each platform
+        contacts = {}
+        for contact in Contact.query.filter(
+            Contact.business_id.in_(business_ids),
+            Contact.type.in_(platforms)
+        ).order_by(Contact.id):
+            contacts.setdefault((contact.business_id, contact.type), contact)
+        
+        # Messages this campaign already has for the batch
+        existing_messages = set(
+            db.session.query(Message.business_id, Message.contact_id, Message.platform).filter(
+                Message.campaign_id == campaign.id,
+                Message.business_id.in_(business_ids)
+            )
+        )
+        
+        outgoing = []
+        for business in businesses:
+            for platform in platforms:
+                contact = contacts.get((business.id, platform))
+                if not contact:
+                    continue
+                
+                if (business.id, contact.id, platform) in existing_messages:
+                    continue  # Skip if message already exists
+                
+                message = {
+                    'business_id': business.id,
+                    'business_name': business.name,
+                    'contact_id': contact.id,
+                    'contact_value': contact.value,
+                    'platform': platform,
+                    'personalized_content': self.generate_personalized_message(
+                        campaign.message_template, business, contact
+                    )
+                }
+                
+                # For social media platforms, generate instructions around the same render
+                if platform != 'email':
+                    message['instructions'] = self.generate_social_media_message(
+                        business, contact, campaign.message_template, message['personalized_content']
+                    )
+                
+                outgoing.append(message)
+        
+        return outgoing
+    
+    def send_batch(self, campaign, outgoing, control=None):
+        """Record and deliver a batch of rendered messages
+        
+        The messages are first inserted as pending in one statement and
+        committed, so an interrupted send is never repeated. Their final
+        statuses are then written back with one bulk update. Emails left
+        unsent because the campaign was stopped while waiting on rate limits
+        are removed again, and the ids of their businesses returned.
+        """
+        sent_count = 0
+        failed_count = 0
+        social_media_instructions = []
+        subject = f"Message from {campaign.name}"
+        
+        result = db.session.execute(
+            db.insert(Message).returning(Message.id, Message.business_id, Message.platform),
+            [{
+                'campaign_id': campaign.id,
+                'business_id': message['business_id'],
+                'contact_id': message['contact_id'],
+                'platform': message['platform'],
+                'personalized_content': message['personalized_content'],
+                'status': 'pending'
+            } for message in outgoing]
+        )
+        message_ids = {(business_id, platform): message_id for message_id, business_id, platform in result}
+        db.session.commit()
+        
+        # Send emails in parallel over the SMTP pool
+        emails = [message for message in outgoing if message['platform'] == 'email']
+        results = self.send_emails([
+            (message['contact_value'], subject, message['personalized_content'], message['business_name'])
+            for message in emails
+        ], control.is_stopped if control else None)
+        for message, result in zip(emails, results):
+            message['result'] = result
+        
+        updates = []
+        events = []
+        unsent_ids = []
+        unsent_business_ids = []
+        for message in outgoing:
+            message_id = message_ids[(message['business_id'], message['platform'])]
+            
+            # Record the result based on platform
+            if message['platform'] == 'email' and message['result'] is None:
+                unsent_ids.append(message_id)
+                unsent_business_ids.append(message['business_id'])
+            
+            elif message['platform'] == 'email':
+                success, error_msg = message['result']
+                
+                if success:
+                    updates.append({'id': message_id, 'status': 'sent', 'sent_at': datetime.utcnow()})
+                    sent_count += 1
+                else:
+                    updates.append({'id': message_id, 'status': 'failed', 'sent_at': None})
+                    failed_count += 1
+                    logger.error(f"Failed to send email to {message['contact_value']}: {error_msg}")
+                events.append((datetime.utcnow().date(), campaign.id, message['platform'], updates[-1]['status']))
+            
+            elif message['instructions']:
+                social_media_instructions.append(message['instructions'])  # Requires manual action
+            
+            else:
+                updates.append({'id': message_id, 'status': 'failed', 'sent_at': None})
+                failed_count += 1
+                events.append((datetime.utcnow().date(), campaign.id, message['platform'], 'failed'))
+        
+        if updates:
+            db.session.execute(db.update(Message), updates)
+            
+            # Count the transitions in the daily rollups, committed with them
+            record_message_events(events)
+        if unsent_ids:
+            db.session.execute(db.delete(Message).where(Message.id.in_(unsent_ids)))
+        db.session.commit()
+        
+        return sent_count, failed_count, social_media_instructions, unsent_business_ids
+    
+    def get_remaining_business_ids(self, business_ids, from_id):
+        """Targeted business ids from from_id on, in send order"""
+        if business_ids:
+            return sorted(business_id for business_id in set(business_ids) if business_id >= from_id)
+        
+        return [
+            business_id for (business_id,) in
+            db.session.query(Business.id).filter(Business.id >= from_id).order_by(Business.id)
+        ]
+    
     def send_campaign_messages(self, campaign_id, business_ids=None, platforms=None):
-        """Send messages for a campaign"""
+        """Send messages for a campaign
+        
+        Businesses are processed in batches: each batch costs a few
+        set-based queries, one bulk insert, one bulk update and two commits
+        however many messages it holds. The cached responses are dropped
+        once the send stops, rather than after every batch.
+        """
+        sent_batches = 0
         try:
             campaign = Campaign.query.get(campaign_id)
             if not campaign:
@@ -114,96 +495,54 @@ class OutreachManager:
             if not platforms:
                 platforms = ['email']
             
-            # Get businesses to send to
-            query = Business.query
-            if business_ids:
-                query = query.filter(Business.id.in_(business_ids))
-            
-            businesses = query.all()
-            
             sent_count = 0
             failed_count = 0
             social_media_instructions = []
+            total_businesses = 0
+            remaining_business_ids = None
+            control = CampaignControl(campaign_id)
             
-            for business in businesses:
-                for platform in platforms:
-                    # Find contact for this platform
-                    contact = Contact.query.filter_by(
-                        business_id=business.id,
-                        type=platform
-                    ).first()
-                    
-                    if not contact:
-                        continue
-                    
-                    # Check if message already exists for this combination
-                    existing_message = Message.query.filter_by(
-                        campaign_id=campaign_id,
-                        business_id=business.id,
-                        contact_id=contact.id,
-                        platform=platform
-                    ).first()
-                    
-                    if existing_message:
-                        continue  # Skip if message already exists
-                    
-                    # Generate personalized message
-                    personalized_content = self.generate_personalized_message(
-                        campaign.message_template, business, contact
-                    )
-                    
-                    # Create message record
-                    message = Message(
-                        campaign_id=campaign_id,
-                        business_id=business.id,
-                        contact_id=contact.id,
-                        platform=platform,
-                        personalized_content=personalized_content,
-                        status='pending'
+            for businesses in self.iter_business_batches(business_ids):
+                # Batches are committed as a whole, so stopping between them
+                # leaves every business either fully handled or untouched
+                if control.is_stopped():
+                    remaining_business_ids = self.get_remaining_business_ids(business_ids, businesses[0].id)
+                    break
+                
+                total_businesses += len(businesses)
+                
+                outgoing = self.prepare_batch(campaign, businesses, platforms)
+                if not outgoing:
+                    continue
+                
+                batch_sent, batch_failed, batch_instructions, unsent_business_ids = self.send_batch(
+                    campaign, outgoing, control
+                )
+                sent_batches += 1
+                sent_count += batch_sent
+                failed_count += batch_failed
+                social_media_instructions.extend(batch_instructions)
+                
+                # Stopped within the batch while waiting on rate limits
+                if unsent_business_ids:
+                    remaining_business_ids = sorted(set(unsent_business_ids)) + self.get_remaining_business_ids(
+                        business_ids, businesses[-1].id + 1
                     )
-                    
-                    db.session.add(message)
-                    db.session.flush()  # Get message ID
-                    
-                    # Send message based on platform
-                    if platform == 'email':
-                        # Send email
-                        subject = f"Message from {campaign.name}"
-                        success, error_msg = self.send_email(
-                            contact.value, subject, personalized_content, business.name
-                        )
-                        
-                        if success:
-                            message.status = 'sent'
-                            message.sent_at = datetime.utcnow()
-                            sent_count += 1
-                        else:
-                            message.status = 'failed'
-                            failed_count += 1
-                            logger.error(f"Failed to send email to {contact.value}: {error_msg}")
-                    
-                    else:
-                        # For social media platforms, generate instructions
-                        instructions = self.generate_social_media_message(
-                            business, contact, campaign.message_template
-                        )
-                        
-                        if instructions:
-                            social_media_instructions.append(instructions)
-                            message.status = 'pending'  # Requires manual action
-                        else:
-                            message.status = 'failed'
-                            failed_count += 1
-                    
-                    db.session.commit()
+                    break
+            
+            if remaining_business_ids is not None:
+                logger.info(f"Campaign {campaign_id} stopped with {len(remaining_business_ids)} businesses left")
             
             result = {
                 'success': True,
                 'sent_count': sent_count,
                 'failed_count': failed_count,
                 'social_media_instructions': social_media_instructions,
-                'total_businesses': len(businesses)
+                'total_businesses': total_businesses,
+                'paused': remaining_business_ids is not None
             }
+            if remaining_business_ids is not None:
+                result['remaining_business_ids'] = remaining_business_ids
             
             logger.info(f"Campaign {campaign_id} sending completed: {sent_count} sent, {failed_count} failed")
             return result
@@ -212,6 +551,236 @@ class OutreachManager:
             db.session.rollback()
             logger.error(f"Error sending campaign messages: {str(e)}")
             return {'success': False, 'error': str(e)}
+        
+        finally:
+            self.smtp_pool.close()
+            if sent_batches:
+                invalidate_cached_responses()
+
+def iter_business_id_chunks(business_ids=None, chunk_size=SEND_CHUNK_SIZE):
+    """Split the targeted business ids into ordered chunks"""
+    if business_ids:
+        business_ids = sorted(set(business_ids))
+    else:
+        business_ids = [business_id for (business_id,) in db.session.query(Business.id).order_by(Business.id)]
+    
+    for i in range(0, len(business_ids), chunk_size):
+        yield business_ids[i:i + chunk_size]
+
+def merge_send_results(results):
+    """Combine the results of the chunks of a campaign send"""
+    result = {
+        'success': all(chunk['success'] for chunk in results),
+        'sent_count': sum(chunk.get('sent_count', 0) for chunk in results),
+        'failed_count': sum(chunk.get('failed_count', 0) for chunk in results),
+        'social_media_instructions': [
+            instructions for chunk in results for instructions in chunk.get('social_media_instructions', [])
+        ],
+        'total_businesses': sum(chunk.get('total_businesses', 0) for chunk in results),
+        'paused': any(chunk.get('paused') for chunk in results)
+    }
+    
+    if result['paused']:
+        result['remaining_business_ids'] = sorted(
+            business_id for chunk in results for business_id in chunk.get('remaining_business_ids', [])
+        )
+    
+    errors = [chunk['error'] for chunk in results if not chunk['success']]
+    if errors:
+        result['error'] = '; '.join(dict.fromkeys(errors))
+    
+    return result
+
+def finish_campaign_send(campaign_id, result, platforms=None):
+    """Settle the campaign status once every part of a send has stopped
+    
+    A send that stopped on a pause leaves a checkpoint with the businesses
+    it did not reach. If the campaign was resumed while the send was still
+    winding down, those businesses are sent to right away instead. When
+    background tasks are off they are sent within this call and added to
+    result. Returns the id of a follow-up send dispatched to the workers,
+    if any.
+    
+    A campaign paused after the send went past its last check has nothing
+    left to send, and is settled as if it had not been paused. So a paused
+    campaign without a checkpoint always has a send winding down.
+    """
+    campaign = Campaign.query.filter_by(id=campaign_id).with_for_update().first()
+    if not campaign:
+        return None
+    
+    remaining_business_ids = result.get('remaining_business_ids')
+    if remaining_business_ids:
+        if campaign.status == 'paused':
+            if campaign.checkpoint:
+                db.session.delete(campaign.checkpoint)
+                db.session.flush()
+            db.session.add(CampaignCheckpoint(
+                campaign_id=campaign_id,
+                platforms=json.dumps(platforms or ['email']),
+                business_ids=json.dumps(remaining_business_ids)
+            ))
+        
+        db.session.commit()
+        
+        if campaign.status != 'sending':
+            return None
+        if run_in_request():
+            # No worker to hand the businesses to, so send them here and
+            # report them in the result of the send
+            follow_up = send_campaign_messages_sync(campaign_id, remaining_business_ids, platforms)
+            follow_up_task_id = finish_campaign_send(campaign_id, follow_up, platforms)
+            
+            sent_part = dict(result, paused=False)
+            del sent_part['remaining_business_ids']
+            result.clear()
+            result.update(merge_send_results([sent_part, follow_up]))
+            return follow_up_task_id
+        return dispatch_campaign_send(campaign_id, remaining_business_ids, platforms)
+    
+    if campaign.status == 'sending' or (campaign.status == 'paused' and not campaign.checkpoint):
+        if result['success']:
+            campaign.status = 'completed' if result['sent_count'] > 0 else 'draft'
+        else:
+            campaign.status = 'draft'
+    
+    db.session.commit()
+    invalidate_cached_responses()
+    return None
+
+def fail_campaign_send(campaign_id, business_ids, platforms=None):
+    """Pause a campaign whose send failed, with a checkpoint to resume it from
+    
+    Which chunks got through is unknown, so the checkpoint holds every
+    business of the send; businesses already sent to are skipped when the
+    campaign is resumed.
+    """
+    campaign = Campaign.query.filter_by(id=campaign_id).with_for_update().first()
+    if not campaign or campaign.status not in ('sending', 'paused'):
+        db.session.commit()
+        return
+    
+    if campaign.checkpoint:
+        db.session.delete(campaign.checkpoint)
+        db.session.flush()
+    db.session.add(CampaignCheckpoint(
+        campaign_id=campaign_id,
+        platforms=json.dumps(platforms or ['email']),
+        business_ids=json.dumps(business_ids)
+    ))
+    campaign.status = 'paused'
+    
+    db.session.commit()
+    invalidate_cached_responses()
+
+def resume_campaign_send(campaign):
+    """Continue a paused campaign from its checkpoint
+    
+    Returns the id of the dispatched send, or None when there is no
+    checkpoint yet because the paused send is still winding down. In that
+    case the running send carries on, or dispatches what it left over. The
+    campaign is locked and read again first, since that send may have
+    finished the campaign in the meantime; it is then left as it is.
+    """
+    db.session.refresh(campaign, with_for_update=True)
+    if campaign.status != 'paused':
+        db.session.commit()
+        return None
+    
+    checkpoint = campaign.checkpoint
+    campaign.status = 'sending'
+    if not checkpoint:
+        db.session.commit()
+        return None
+    
+    business_ids = json.loads(checkpoint.business_ids)
+    platforms = json.loads(checkpoint.platforms)
+    db.session.delete(checkpoint)
+    db.session.commit()
+    
+    try:
+        return dispatch_campaign_send(campaign.id, business_ids, platforms)
+    except Exception:
+        # Keep the checkpoint so the campaign can be resumed again
+        campaign.status = 'paused'
+        db.session.add(CampaignCheckpoint(
+            campaign_id=campaign.id,
+            platforms=checkpoint.platforms,
+            business_ids=checkpoint.business_ids
+        ))
+        db.session.commit()
+        raise
+
+@celery.task(acks_late=True, reject_on_worker_lost=True)
+def send_campaign_chunk_task(campaign_id, business_ids, platforms=None):
+    """Send a campaign to one chunk of businesses
+    
+    Messages are recorded before they are delivered, so a chunk that is
+    redelivered after a worker crash skips what was already sent.
+    """
+    return send_campaign_messages_sync(campaign_id, business_ids, platforms)
+
+@celery.task
+def finalize_campaign_task(results, campaign_id, platforms=None):
+    """Aggregate the chunk results once every chunk of a send has finished"""
+    result = merge_send_results(results)
+    
+    follow_up_task_id = finish_campaign_send(campaign_id, result, platforms)
+    if follow_up_task_id:
+        result['follow_up_task_id'] = follow_up_task_id
+    
+    logger.info(
+        f"Campaign {campaign_id} sending completed: "
+        f"{result['sent_count']} sent, {result['failed_count']} failed"
+    )
+    return result
+
+@celery.task
+def campaign_send_failed_task(request, exc, traceback, campaign_id, business_ids, platforms=None):
+    """Errback of a send whose chunks failed, so the campaign does not stay 'sending'"""
+    logger.error(f"Campaign {campaign_id} send failed, pausing it: {str(exc)}")
+    fail_campaign_send(campaign_id, business_ids, platforms)
+
+@celery.task
+def rebuild_message_rollups_task(days=ROLLUP_REBUILD_DAYS, full_history=False):
+    """Recompute the daily message rollups of the last days, or of every day, from the messages"""
+    end_day = datetime.utcnow().date()
+    if full_history:
+        rows = backfill_rollups(end_day=end_day)
+        logger.info(f"Backfilled message rollups up to {end_day}: {rows} counters")
+        return {'end': end_day.isoformat(), 'counters': rows}
+    
+    start_day = end_day - timedelta(days=days - 1)
+    rows = rebuild_rollups(start_day, end_day)
+    logger.info(f"Rebuilt message rollups from {start_day} to {end_day}: {rows} counters")
+    return {'start': start_day.isoformat(), 'end': end_day.isoformat(), 'counters': rows}
+
+def dispatch_campaign_send(campaign_id, business_ids=None, platforms=None):
+    """Fan a campaign send out over chunk tasks on the outreach queue
+    
+    The chunks run as a chord whose callback aggregates their results and
+    completes the campaign. If a chunk fails for good, or is revoked, the
+    callback never runs and its errback pauses the campaign instead. The
+    chunk group is saved under the id of the callback, so the task status
+    endpoint can report progress on that id while chunks are still
+    running. Returns the id.
+    """
+    task_id = uuid()
+    chunk_size = int(os.getenv('SEND_CHUNK_SIZE', str(SEND_CHUNK_SIZE)))
+    chunks = list(iter_business_id_chunks(business_ids, chunk_size))
+    
+    header = group(send_campaign_chunk_task.s(campaign_id, chunk, platforms) for chunk in chunks)
+    callback = finalize_campaign_task.s(campaign_id, platforms).on_error(
+        campaign_send_failed_task.s(campaign_id, [business_id for chunk in chunks for business_id in chunk], platforms)
+    )
+    
+    result = chord(header, callback).apply_async(task_id=task_id)
+    
+    # Eager chords run to completion right away and have no parent group
+    if result.parent is not None:
+        celery.GroupResult(task_id, result.parent.results).save()
+    
+    return task_id
 
 # Synchronous functions for immediate use
 def send_campaign_messages_sync(campaign_id, business_ids=None, platforms=None):
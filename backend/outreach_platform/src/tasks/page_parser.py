@@ -0,0 +1,149 @@
+import os
+import logging
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+class PageDocument:
+    """The parts of an HTML page the scanner looks at"""
+
+    def __init__(self):
+        self.links = []  # (href, link text) of every <a href>
+        self.forms = []  # {'action': ..., 'has_email_field': ...} of every <form>
+        self.text_parts = []
+
+    @property
+    def text(self):
+        """Visible text of the page"""
+        return ''.join(self.text_parts)
+
+class DocumentTarget:
+    """lxml parser target collecting links, forms and text into a PageDocument
+
+    lxml calls start/end/data as it parses and never materializes elements,
+    so memory use does not depend on the page structure.
+    """
+
+    # Elements whose text is not part of the visible page
+    SKIPPED_TAGS = {'script', 'style', 'template'}
+
+    def __init__(self):
+        self.document = PageDocument()
+        self.current_link = None
+        self.current_form = None
+        self.skip_depth = 0
+
+    def start(self, tag, attrib):
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == 'a' and 'href' in attrib:
+            self.current_link = (attrib['href'], [])
+        elif tag == 'form':
+            self.current_form = {'action': attrib.get('action', ''), 'has_email_field': False}
+            self.document.forms.append(self.current_form)
+        elif tag in ('input', 'textarea') and self.current_form is not None:
+            # Check if the form has an email input or contact-related field
+            if any('email' in attrib.get(name, '').lower() for name in ('name', 'type', 'id')):
+                self.current_form['has_email_field'] = True
+
+    def end(self, tag):
+        if tag in self.SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag == 'a' and self.current_link is not None:
+            href, text_parts = self.current_link
+            self.document.links.append((href, ''.join(text_parts).strip()))
+            self.current_link = None
+        elif tag == 'form':
+            self.current_form = None
+
+    def data(self, data):
+        if self.skip_depth:
+            return
+        self.document.text_parts.append(data)
+        if self.current_link is not None:
+            self.current_link[1].append(data)
+
+    def close(self):
+        return self.document
+
+class LxmlPageParser:
+    """Fast parser feeding lxml events straight into a PageDocument"""
+
+    def __init__(self):
+        self.target = DocumentTarget()
+        self.parser = etree.HTMLParser(target=self.target, recover=True)
+
+    def feed(self, data):
+        """Parse the next chunk of the page"""
+        self.parser.feed(data)
+
+    def close(self):
+        """Finish parsing and return the collected document"""
+        try:
+            self.parser.close()
+        except etree.LxmlError as e:
+            # Empty or hopelessly broken pages; keep whatever was collected
+            logger.debug(f"HTML parser error: {str(e)}")
+        return self.target.document
+
+class SoupPageParser:
+    """Fallback parser using BeautifulSoup with the standard library backend"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def feed(self, data):
+        """Buffer the next chunk of the page"""
+        self.chunks.append(data)
+
+    def close(self):
+        """Parse the buffered page and return the collected document"""
+        if self.chunks and isinstance(self.chunks[0], bytes):
+            content = b''.join(self.chunks)
+        else:
+            content = ''.join(self.chunks)
+
+        document = PageDocument()
+        if not content:
+            return document
+
+        soup = BeautifulSoup(content, 'html.parser')
+
+        document.links = [(link['href'], link.get_text().strip()) for link in soup.find_all('a', href=True)]
+        document.text_parts = [soup.get_text()]
+
+        for form in soup.find_all('form'):
+            inputs = form.find_all(['input', 'textarea'])
+            document.forms.append({
+                'action': form.get('action', ''),
+                'has_email_field': any(
+                    'email' in input.get('name', '').lower() or
+                    'email' in input.get('type', '').lower() or
+                    'email' in input.get('id', '').lower()
+                    for input in inputs
+                )
+            })
+
+        return document
+
+PAGE_PARSERS = {
+    'lxml': LxmlPageParser,
+    'html.parser': SoupPageParser
+}
+
+def get_page_parser_class(name=None):
+    """Pick a parser backend, preferring lxml when it is installed"""
+    name = name or os.getenv('SCAN_HTML_PARSER')
+    if name:
+        if name not in PAGE_PARSERS:
+            raise ValueError(f"Unknown HTML parser '{name}'. Must be one of: {list(PAGE_PARSERS)}")
+        if name == 'lxml' and etree is None:
+            raise ValueError("The lxml HTML parser requires the lxml package")
+        return PAGE_PARSERS[name]
+
+    return LxmlPageParser if etree is not None else SoupPageParser
@@ -0,0 +1,52 @@
+import time
+
+# Minimum number of seconds between two progress writes
+DEFAULT_MIN_INTERVAL = 2.0
+
+# Number of items after which progress is written regardless of time
+DEFAULT_MIN_ITEMS = 5000
+
+class ProgressReporter:
+    """Coalesce Celery task progress updates into occasional backend writes
+
+    Every update_state call is a round-trip to the result backend, so tasks
+    report progress through this class. A write happens only when enough time
+    has passed or enough items were processed since the previous one. Call
+    flush() when the task is done so the final state is always written.
+    """
+
+    def __init__(self, task, total, min_interval=DEFAULT_MIN_INTERVAL, min_items=DEFAULT_MIN_ITEMS):
+        self.task = task
+        self.total = total
+        self.min_interval = min_interval
+        self.min_items = min_items
+
+        self.current = 0
+        self.meta = {}
+        self.dirty = False
+        self.last_reported_current = 0
+        self.last_reported_at = time.monotonic()
+
+    def update(self, current, **meta):
+        """Record progress and write it if the throttle allows"""
+        self.current = current
+        self.meta = meta
+        self.dirty = True
+
+        if (current - self.last_reported_current >= self.min_items or
+                time.monotonic() - self.last_reported_at >= self.min_interval):
+            self.flush()
+
+    def flush(self):
+        """Write the pending progress, whatever the throttle state"""
+        if not self.dirty:
+            return
+
+        self.task.update_state(
+            state='PROGRESS',
+            meta=dict(self.meta, current=self.current, total=self.total)
+        )
+
+        self.dirty = False
+        self.last_reported_current = self.current
+        self.last_reported_at = time.monotonic()
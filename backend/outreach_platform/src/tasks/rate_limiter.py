@@ -0,0 +1,170 @@
+import logging
+import os
+import threading
+import time
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Default messages per second per sending account and per recipient domain,
+# for platforms that are sent to automatically
+DEFAULT_RATE_LIMITS = {
+    'email': {'account': 5.0, 'domain': 1.0}
+}
+
+# Takes a token from every bucket in KEYS, or from none of them. ARGV holds
+# the rate and capacity of each bucket. Returns 0 when the tokens were
+# taken, or else the seconds until every bucket has one.
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local capacity = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'updated_at')
+    local available = tonumber(state[1]) or capacity
+    local updated_at = tonumber(state[2]) or now
+    available = math.min(capacity, available + math.max(0, now - updated_at) * rate)
+    tokens[i] = available
+    if available < 1 then
+        wait = math.max(wait, (1 - available) / rate)
+    end
+end
+
+if wait > 0 then
+    return tostring(wait)
+end
+
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local capacity = tonumber(ARGV[2 * i])
+    redis.call('HSET', key, 'tokens', tokens[i] - 1, 'updated_at', now)
+    -- A bucket left alone this long is full again, which is the default
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return '0'
+"""
+
+class LocalTokenBuckets:
+    """Token buckets kept in this process, shared by its threads"""
+
+    def __init__(self):
+        self.buckets = {}  # key -> (tokens, updated_at)
+        self.lock = threading.Lock()
+
+    def acquire(self, limits):
+        """Take a token from every (key, rate, capacity) bucket, or from none
+
+        Returns 0 when the tokens were taken, or else the number of seconds
+        until every bucket has one.
+        """
+        with self.lock:
+            now = time.monotonic()
+            tokens = []
+            wait = 0
+            for key, rate, capacity in limits:
+                available, updated_at = self.buckets.get(key, (capacity, now))
+                available = min(capacity, available + (now - updated_at) * rate)
+                tokens.append(available)
+                if available < 1:
+                    wait = max(wait, (1 - available) / rate)
+
+            if wait:
+                return wait
+
+            for (key, rate, capacity), available in zip(limits, tokens):
+                self.buckets[key] = (available - 1, now)
+            return 0
+
+class RedisTokenBuckets:
+    """Token buckets kept in Redis, shared by every worker"""
+
+    def __init__(self, client):
+        self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, limits):
+        """Take a token from every (key, rate, capacity) bucket, or from none"""
+        args = []
+        for _, rate, capacity in limits:
+            args.extend([rate, capacity])
+        return float(self.script(keys=[key for key, _, _ in limits], args=args))
+
+# Buckets used while Redis is unreachable
+local_buckets = LocalTokenBuckets()
+
+def get_token_buckets():
+    """Redis-backed buckets when Redis is reachable, in-process ones otherwise"""
+    try:
+        client = redis.Redis.from_url(
+            os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+            socket_connect_timeout=1,
+            socket_timeout=5
+        )
+        client.ping()
+        return RedisTokenBuckets(client)
+    except redis.RedisError as e:
+        logger.warning(f"Redis unavailable, rate limiting within this process only: {str(e)}")
+        return local_buckets
+
+def get_rate_limit(platform, scope):
+    """Messages per second allowed for a platform and scope, or None if unlimited
+
+    Configured through <PLATFORM>_RATE_LIMIT for the sending account and
+    <PLATFORM>_DOMAIN_RATE_LIMIT for each recipient domain. 0 disables a limit.
+    """
+    name = f'{platform.upper()}_RATE_LIMIT' if scope == 'account' else f'{platform.upper()}_DOMAIN_RATE_LIMIT'
+    default = DEFAULT_RATE_LIMITS.get(platform, {}).get(scope)
+    value = os.getenv(name)
+    rate = float(value) if value else default
+    return rate if rate else None
+
+def get_recipient_domain(recipient):
+    """Domain an email address or profile URL belongs to"""
+    if '@' in recipient:
+        return recipient.rsplit('@', 1)[1].lower()
+    return recipient.split('://', 1)[-1].split('/', 1)[0].lower()
+
+class RateLimiter:
+    """Token-bucket rate limits per platform, sending account and recipient domain
+
+    Each send takes one token from the bucket of its sending account and
+    one from the bucket of its recipient domain. A bucket holds up to one
+    second's worth of tokens, at least one, so short bursts are allowed.
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets or get_token_buckets()
+
+    def is_limited(self, platform):
+        """Whether sends on a platform are rate limited at all"""
+        return any(get_rate_limit(platform, scope) for scope in ('account', 'domain'))
+
+    def get_limits(self, platform, account, recipient):
+        """(key, rate, capacity) of the buckets a send draws from"""
+        limits = []
+        account_rate = get_rate_limit(platform, 'account')
+        if account_rate:
+            limits.append((f'ratelimit:{platform}:account:{account}', account_rate, max(1.0, account_rate)))
+
+        domain_rate = get_rate_limit(platform, 'domain')
+        if domain_rate:
+            domain = get_recipient_domain(recipient)
+            limits.append((f'ratelimit:{platform}:domain:{domain}', domain_rate, max(1.0, domain_rate)))
+
+        return limits
+
+    def acquire(self, platform, account, recipient):
+        """Reserve a send, returning 0 or the seconds to wait before trying again"""
+        limits = self.get_limits(platform, account, recipient)
+        if not limits:
+            return 0
+
+        try:
+            return self.buckets.acquire(limits)
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiting within this process only after a Redis error: {str(e)}")
+            self.buckets = local_buckets
+            return self.buckets.acquire(limits)
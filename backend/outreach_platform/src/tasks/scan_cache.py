@@ -0,0 +1,61 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+def get_scan_cache_dir():
+    """Directory of the scan cache, or None when caching is disabled"""
+    return os.getenv('SCAN_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'outreach_scan_cache')) or None
+
+class ScanCache:
+    """On-disk cache of HTTP validators and scan results per URL
+
+    Each URL is stored as a small JSON file holding the ETag and
+    Last-Modified headers of the last response together with the results
+    extracted from it, so rescans can send conditional requests.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def get_path(self, url):
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f'{digest}.json')
+
+    def get(self, url):
+        """Return the cached entry for a URL, or None"""
+        try:
+            with open(self.get_path(url)) as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable scan cache entry for {url}: {str(e)}")
+            return None
+
+        # Guard against hash collisions
+        return entry if entry.get('url') == url else None
+
+    def set(self, url, validators, results):
+        """Store the validators and results of a fresh response"""
+        path = self.get_path(url)
+        entry = {
+            'url': url,
+            'etag': validators.get('etag'),
+            'last_modified': validators.get('last_modified'),
+            'results': results
+        }
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            # Write to a temporary file first so readers never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write scan cache entry for {url}: {str(e)}")
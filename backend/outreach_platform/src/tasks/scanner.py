@@ -1,52 +1,243 @@
 import requests
-from bs4 import BeautifulSoup
+import codecs
+import heapq
 import re
+import os
+import threading
 import time
 import logging
-from urllib.parse import urljoin, urlparse
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urldefrag, urljoin, urlparse
 from src.models.business import db, Business, Contact
+from src.models.bulk import insert_ignoring_conflicts
+from src.services.response_cache import invalidate_cached_responses
+from src.tasks.page_parser import get_page_parser_class
+from src.tasks.scan_cache import ScanCache, get_scan_cache_dir
 
 logger = logging.getLogger(__name__)
 
+# Content types worth parsing for contact information
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml'}
+
+# Size of the chunks read from a response
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Bytes searched for a <meta> charset when the headers declare none
+CHARSET_SNIFF_BYTES = 4096
+
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+)
+
+# Words in a link's URL or text that suggest a page with contact details,
+# with the priority they give the page in crawl mode
+CONTACT_PAGE_KEYWORDS = {
+    'contact': 10,
+    'kontakt': 10,
+    'impressum': 8,
+    'imprint': 8,
+    'about': 6,
+    'team': 5,
+    'support': 4,
+    'location': 3,
+    'company': 2
+}
+
+# Links to files that are never worth crawling
+SKIPPED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.zip', '.mp4', '.mp3', '.css', '.js', '.xml')
+
+# Number of same-site links kept per page for crawl mode
+MAX_PAGE_LINKS = 100
+
+def get_host(url):
+    """Host part of a URL, tolerating URLs without a scheme"""
+    if '://' not in url:
+        url = f'http://{url}'
+    return urlparse(url).netloc.lower()
+
+def get_site(url):
+    """Host of a URL without a leading www., to tell internal links apart"""
+    host = get_host(url)
+    return host[4:] if host.startswith('www.') else host
+
+def sniff_encoding(head):
+    """Encoding of an HTML document whose Content-Type declares no charset
+    
+    Looks for a byte order mark, then for a <meta> charset near the top of
+    the document. Without either, the document is read as UTF-8 if it
+    decodes as such, and as windows-1252 otherwise.
+    """
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(mark):
+            return encoding
+    
+    match = META_CHARSET_PATTERN.search(head[:CHARSET_SNIFF_BYTES])
+    if match:
+        encoding = match.group(1).decode('ascii').lower()
+        try:
+            # A document that can declare its charset in ASCII is not UTF-16
+            if not codecs.lookup(encoding).name.startswith('utf-16'):
+                return encoding
+        except LookupError:
+            pass
+    
+    try:
+        # Incremental, so a character cut at the end of the chunk is no error
+        codecs.getincrementaldecoder('utf-8')().decode(head)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'windows-1252'
+
+def get_decoder(encoding):
+    """Incremental decoder for an encoding, UTF-8 if it is unknown"""
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+def score_link(url, text):
+    """Crawl priority of a link; higher means more likely to list contacts"""
+    haystack = f'{urlparse(url).path} {text}'.lower()
+    return max((score for keyword, score in CONTACT_PAGE_KEYWORDS.items() if keyword in haystack), default=0)
+
+class PoliteScheduler:
+    """Run fetches concurrently while spacing out requests to the same host"""
+
+    def __init__(self, max_workers, host_delay):
+        self.max_workers = max_workers
+        self.host_delay = host_delay
+
+    def run(self, jobs, fetch):
+        """Call fetch(url) for (key, url) jobs, yielding (key, result) as they finish
+
+        At most max_workers fetches run at once and at most one per host. A host
+        is fetched again only host_delay seconds after its previous fetch ended.
+        """
+        queues = defaultdict(deque)
+        for key, url in jobs:
+            queues[get_host(url)].append((key, url))
+
+        # Hosts with queued jobs and nothing in flight, by the time they become available
+        ready = [(0, host) for host in queues]
+        heapq.heapify(ready)
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while ready or in_flight:
+                now = time.monotonic()
+                while ready and ready[0][0] <= now and len(in_flight) < self.max_workers:
+                    _, host = heapq.heappop(ready)
+                    key, url = queues[host].popleft()
+                    in_flight[executor.submit(fetch, url)] = (key, host)
+
+                # Wake up for the next completion or the next host becoming available
+                timeout = None
+                if ready and len(in_flight) < self.max_workers:
+                    timeout = max(0, ready[0][0] - now)
+
+                if not in_flight:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, host = in_flight.pop(future)
+                    if queues[host]:
+                        heapq.heappush(ready, (time.monotonic() + self.host_delay, host))
+
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Error fetching {host}: {str(e)}")
+                        result = None
+
+                    yield key, result
+
 class OnlinePresenceScanner:
     """Scanner for finding business websites and social media profiles"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        
-        # Social media patterns
-        self.social_patterns = {
-            'instagram': [
-                r'instagram\.com/([a-zA-Z0-9_.]+)',
-                r'instagr\.am/([a-zA-Z0-9_.]+)'
-            ],
-            'facebook': [
-                r'facebook\.com/([a-zA-Z0-9_.]+)',
-                r'fb\.com/([a-zA-Z0-9_.]+)',
-                r'facebook\.com/pages/([^/]+/[0-9]+)'
-            ],
-            'twitter': [
-                r'twitter\.com/([a-zA-Z0-9_]+)',
-                r'x\.com/([a-zA-Z0-9_]+)'
-            ],
-            'linkedin': [
-                r'linkedin\.com/company/([a-zA-Z0-9-]+)',
-                r'linkedin\.com/in/([a-zA-Z0-9-]+)'
-            ]
-        }
+    # Social media patterns
+    SOCIAL_PATTERNS = {
+        'instagram': [
+            r'instagram\.com/([a-zA-Z0-9_.]+)',
+            r'instagr\.am/([a-zA-Z0-9_.]+)'
+        ],
+        'facebook': [
+            r'facebook\.com/([a-zA-Z0-9_.]+)',
+            r'fb\.com/([a-zA-Z0-9_.]+)',
+            r'facebook\.com/pages/([^/]+/[0-9]+)'
+        ],
+        'twitter': [
+            r'twitter\.com/([a-zA-Z0-9_]+)',
+            r'x\.com/([a-zA-Z0-9_]+)'
+        ],
+        'linkedin': [
+            r'linkedin\.com/company/([a-zA-Z0-9-]+)',
+            r'linkedin\.com/in/([a-zA-Z0-9-]+)'
+        ]
+    }
+    
+    # All social media patterns in one regex with a named group per platform,
+    # so a link is classified in a single pass via match.lastgroup. The leading
+    # lookahead on the patterns' first letters lets the regex engine skip most
+    # positions of a link without trying every alternative.
+    SOCIAL_LINK_PATTERN = re.compile(
+        '(?=[' + ''.join(sorted({pattern[0] for patterns in SOCIAL_PATTERNS.values() for pattern in patterns})) + '])'
+        '(?:' + '|'.join(f"(?P<{platform}>{'|'.join(patterns)})" for platform, patterns in SOCIAL_PATTERNS.items()) + ')',
+        re.IGNORECASE
+    )
+    
+    # Email pattern
+    EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+    
+    # Phone patterns
+    PHONE_PATTERNS = [
+        re.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'),  # US format
+        re.compile(r'\+\d{1,3}[-.\s]?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}'),  # International
+    ]
+    
+    def __init__(self, parser_class=None, cache=None, crawl=None):
+        # Sessions are not shared between the scan worker threads
+        self.local = threading.local()
         
-        # Email pattern
-        self.email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        # HTML parser backend, lxml unless configured otherwise
+        self.parser_class = parser_class or get_page_parser_class()
         
-        # Phone patterns
-        self.phone_patterns = [
-            r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',  # US format
-            r'\+\d{1,3}[-.\s]?\d{1,4}[-.\s]?\d{1,4}[-.\s]?\d{1,9}',  # International
-        ]
+        # Pages are truncated after this many bytes
+        self.max_page_bytes = int(os.getenv('SCAN_MAX_PAGE_BYTES', str(2 * 1024 * 1024)))
+        
+        # Validators and results of previous scans, for conditional requests
+        if cache is None and get_scan_cache_dir():
+            cache = ScanCache(get_scan_cache_dir())
+        self.cache = cache
+        
+        # Crawl mode follows internal links beyond the homepage
+        self.crawl = os.getenv('SCAN_CRAWL', 'false').lower() == 'true' if crawl is None else crawl
+        self.crawl_max_pages = int(os.getenv('SCAN_CRAWL_MAX_PAGES', '5'))
+        self.crawl_max_depth = int(os.getenv('SCAN_CRAWL_MAX_DEPTH', '2'))
+        self.crawl_email_target = int(os.getenv('SCAN_CRAWL_EMAIL_TARGET', '1'))
+
+        # Concurrency settings for bulk scans
+        self.max_workers = int(os.getenv('SCAN_CONCURRENCY', '10'))
+        self.host_delay = float(os.getenv('SCAN_HOST_DELAY', '2'))
     
+    @property
+    def session(self):
+        """HTTP session of the current thread"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            })
+            self.local.session = session
+        return session
+
     def search_business_website(self, business_name, location=None):
         """Search for business website using search engines"""
         try:
@@ -67,96 +258,313 @@ class OnlinePresenceScanner:
             logger.error(f"Error searching for business website: {str(e)}")
             return None
     
-    def extract_social_media_links(self, url):
-        """Extract social media links from a website"""
-        social_links = {}
+    def fetch_page(self, url, cached=None):
+        """Download and parse a web page
         
-        try:
-            response = self.session.get(url, timeout=10)
+        The response is streamed: non-HTML content is rejected from its
+        headers, and the body is decoded and fed to the parser chunk by
+        chunk until max_page_bytes have been read. The body is decoded with
+        the charset of the Content-Type header, or else the one sniffed
+        from its first chunk.
+        
+        Returns the parsed page and the response's cache validators. With a
+        cached entry the request is conditional, and the page is None when
+        the server answers 304 Not Modified.
+        """
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        
+        with self.session.get(url, timeout=10, stream=True, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                return None, cached
+            
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            
+            content_type = response.headers.get('Content-Type', '')
+            mime_type = content_type.split(';')[0].strip().lower()
+            if mime_type and mime_type not in HTML_CONTENT_TYPES:
+                raise ValueError(f"Unsupported content type: {mime_type}")
             
-            # Get all links
-            links = soup.find_all('a', href=True)
+            # Without a declared charset, requests assumes ISO-8859-1 for text/*,
+            # so the encoding is sniffed from the start of the body instead
+            declared_encoding = response.encoding if 'charset' in content_type.lower() else None
+            decoder = None
             
-            # Extract social media links
-            for link in links:
-                href = link['href']
+            parser = self.parser_class()
+            received = 0
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                chunk = chunk[:self.max_page_bytes - received]
+                received += len(chunk)
+                if decoder is None:
+                    decoder = get_decoder(declared_encoding or sniff_encoding(chunk))
+                parser.feed(decoder.decode(chunk))
                 
-                for platform, patterns in self.social_patterns.items():
-                    for pattern in patterns:
-                        match = re.search(pattern, href, re.IGNORECASE)
-                        if match:
-                            # Clean up the URL
-                            if not href.startswith('http'):
-                                href = urljoin(url, href)
-                            
-                            if platform not in social_links:
-                                social_links[platform] = []
-                            
-                            if href not in social_links[platform]:
-                                social_links[platform].append(href)
-                            break
-            
-            logger.info(f"Found social media links for {url}: {social_links}")
-            return social_links
+                if received >= self.max_page_bytes:
+                    logger.info(f"Truncated {url} after {received} bytes")
+                    break
             
-        except Exception as e:
-            logger.error(f"Error extracting social media links from {url}: {str(e)}")
-            return {}
+            if decoder is not None:
+                parser.feed(decoder.decode(b'', final=True))
+            return parser.close(), validators
     
-    def extract_contact_info(self, url):
-        """Extract contact information from a website"""
+    def find_social_media_links(self, page, url):
+        """Find social media links in a parsed page"""
+        social_links = {}
+        
+        # Extract social media links
+        for href, _ in page.links:
+            match = self.SOCIAL_LINK_PATTERN.search(href)
+            if not match:
+                continue
+            
+            platform = match.lastgroup
+            
+            # Clean up the URL
+            if not href.startswith('http'):
+                href = urljoin(url, href)
+            
+            if platform not in social_links:
+                social_links[platform] = []
+            
+            if href not in social_links[platform]:
+                social_links[platform].append(href)
+        
+        return social_links
+    
+    def find_contact_info(self, page, url):
+        """Find emails, phone numbers and contact forms in a parsed page"""
         contact_info = {
             'emails': [],
             'phones': [],
             'contact_forms': []
         }
         
-        try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
+        text_content = page.text
+        
+        # Extract emails
+        emails = self.EMAIL_PATTERN.findall(text_content)
+        contact_info['emails'] = list(set(emails))
+        
+        # Extract phone numbers
+        phones = []
+        for pattern in self.PHONE_PATTERNS:
+            found_phones = pattern.findall(text_content)
+            phones.extend(found_phones)
+        contact_info['phones'] = list(set(phones))
+        
+        # Look for contact forms, i.e. forms with an email field
+        for form in page.forms:
+            if form['has_email_field']:
+                form_action = form['action']
+                if form_action:
+                    if not form_action.startswith('http'):
+                        form_action = urljoin(url, form_action)
+                    contact_info['contact_forms'].append(form_action)
+        
+        return contact_info
+    
+    def find_internal_links(self, page, url):
+        """Links of a parsed page to other HTML pages of the same site"""
+        site = get_site(url)
+        links = []
+        seen = set()
+        
+        for href, text in page.links:
+            link = urldefrag(urljoin(url, href))[0]
+            parsed = urlparse(link)
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text_content = soup.get_text()
-            
-            # Extract emails
-            emails = re.findall(self.email_pattern, text_content)
-            contact_info['emails'] = list(set(emails))
-            
-            # Extract phone numbers
-            phones = []
-            for pattern in self.phone_patterns:
-                found_phones = re.findall(pattern, text_content)
-                phones.extend(found_phones)
-            contact_info['phones'] = list(set(phones))
-            
-            # Look for contact forms
-            forms = soup.find_all('form')
-            for form in forms:
-                # Check if form has email input or contact-related fields
-                inputs = form.find_all(['input', 'textarea'])
-                has_email_field = any(
-                    'email' in input.get('name', '').lower() or 
-                    'email' in input.get('type', '').lower() or
-                    'email' in input.get('id', '').lower()
-                    for input in inputs
-                )
-                
-                if has_email_field:
-                    form_action = form.get('action', '')
-                    if form_action:
-                        if not form_action.startswith('http'):
-                            form_action = urljoin(url, form_action)
-                        contact_info['contact_forms'].append(form_action)
+            if parsed.scheme not in ('http', 'https') or get_site(link) != site:
+                continue
+            if parsed.path.lower().endswith(SKIPPED_EXTENSIONS) or link in seen:
+                continue
             
-            logger.info(f"Found contact info for {url}: {contact_info}")
-            return contact_info
+            seen.add(link)
+            links.append([link, text])
             
+            if len(links) >= MAX_PAGE_LINKS:
+                break
+        
+        return links
+    
+    def analyze_page(self, url):
+        """Collect social media links, contact information and internal links from a page
+        
+        The page is downloaded and parsed once, and every extractor runs over
+        the same document. If the page has not changed since it was cached,
+        the cached results are returned. Fresh results carry the entries to
+        cache in 'cache_entries', which are only written once the results
+        are saved.
+        """
+        cached = self.cache.get(url) if self.cache else None
+        
+        try:
+            page, validators = self.fetch_page(url, cached)
         except Exception as e:
-            logger.error(f"Error extracting contact info from {url}: {str(e)}")
-            return contact_info
+            logger.error(f"Error fetching {url}: {str(e)}")
+            return None
+        
+        if page is None:
+            logger.info(f"{url} not modified since the last scan")
+            return dict(cached['results'])
+        
+        results = {
+            'social_links': self.find_social_media_links(page, url),
+            'contact_info': self.find_contact_info(page, url),
+            'links': self.find_internal_links(page, url)
+        }
+        
+        logger.info(f"Found online presence for {url}: {results}")
+        
+        if self.cache and (validators['etag'] or validators['last_modified']):
+            results['cache_entries'] = [(url, validators, dict(results))]
+        
+        return results
+    
+    def analyze_website(self, url):
+        """Collect social media links and contact information from a website
+        
+        Only the homepage is analyzed unless crawl mode is enabled.
+        """
+        if self.crawl:
+            return self.crawl_website(url)
+        
+        return self.analyze_page(url)
+    
+    def crawl_website(self, url):
+        """Analyze a homepage and the internal pages most likely to list contacts
+        
+        Pages wait in a frontier ordered by how much their link suggests a
+        contact page, then by depth. As in bulk scans, a site gets one
+        request at a time and host_delay seconds between requests. The
+        crawl stops once the page budget is spent, the frontier is empty or
+        enough emails were found.
+        """
+        results = {
+            'social_links': {},
+            'contact_info': {'emails': [], 'phones': [], 'contact_forms': []}
+        }
+        
+        frontier = [(0, 0, url)]
+        queued = {url}
+        pages_fetched = 0
+        
+        while frontier and pages_fetched < self.crawl_max_pages:
+            if len(results['contact_info']['emails']) >= self.crawl_email_target:
+                break
+            
+            _, depth, page_url = heapq.heappop(frontier)
+            if pages_fetched:
+                time.sleep(self.host_delay)
+            
+            page_results = self.analyze_page(page_url)
+            pages_fetched += 1
+            if page_results is None:
+                # Missing pages say nothing about the site as a whole
+                if depth == 0:
+                    return None
+                continue
+            
+            self.merge_results(results, page_results)
+            
+            if depth >= self.crawl_max_depth:
+                continue
+            
+            for link, text in page_results.get('links', []):
+                if link not in queued:
+                    queued.add(link)
+                    heapq.heappush(frontier, (-score_link(link, text), depth + 1, link))
+        
+        logger.info(f"Crawled {pages_fetched} pages of {url}: {results}")
+        return results
+    
+    def merge_results(self, results, page_results):
+        """Add the findings of one page to the results of a crawl"""
+        for platform, urls in page_results['social_links'].items():
+            merged_urls = results['social_links'].setdefault(platform, [])
+            merged_urls.extend(url for url in urls if url not in merged_urls)
+        
+        for key, values in page_results['contact_info'].items():
+            merged_values = results['contact_info'][key]
+            merged_values.extend(value for value in values if value not in merged_values)
+        
+        results.setdefault('cache_entries', []).extend(page_results.get('cache_entries', []))
+    
+    def save_contacts(self, business, found_contacts):
+        """Add scanned (type, value) contacts the business does not have yet
+        
+        Existing contacts are loaded with one query and diffed in memory, and
+        the new ones are written with a single conflict-tolerant INSERT.
+        """
+        existing_contacts = set(
+            db.session.query(Contact.type, Contact.value).filter_by(business_id=business.id)
+        )
+        
+        new_contacts = []
+        for contact_type, value in found_contacts:
+            if (contact_type, value) in existing_contacts:
+                continue
+            existing_contacts.add((contact_type, value))
+            
+            new_contacts.append({
+                'business_id': business.id,
+                'type': contact_type,
+                'value': value,
+                'source': 'scanned_website'
+            })
+        
+        insert_ignoring_conflicts(Contact, new_contacts)
+    
+    def save_scan_results(self, business, results):
+        """Store the contacts found on a website and mark the business as scanned
+        
+        Results of an unchanged page are saved too, since the business that
+        was scanned before may not be this one, and save_contacts skips
+        what the business already has. The fetched pages are only cached
+        once the contacts are committed, so a failed save is retried with a
+        full fetch. Callers drop the cached responses once they are done.
+        """
+        if results:
+            # Social media contacts
+            found_contacts = [
+                (platform, url)
+                for platform, urls in results['social_links'].items()
+                for url in urls
+            ]
+            
+            # Email, phone and contact form contacts
+            contact_info = results['contact_info']
+            found_contacts += [('email', email) for email in contact_info['emails']]
+            found_contacts += [('phone', phone) for phone in contact_info['phones']]
+            found_contacts += [('contact_form', form_url) for form_url in contact_info['contact_forms']]
+            
+            self.save_contacts(business, found_contacts)
+        
+        # Update business status
+        business.status = 'scanned'
+        db.session.commit()
+        
+        if results and self.cache:
+            for url, validators, page_results in results.get('cache_entries', []):
+                self.cache.set(url, validators, page_results)
+    
+    def find_website(self, business):
+        """Look up a website for a business that has none"""
+        if not business.website:
+            website = self.search_business_website(business.name, business.address)
+            if website:
+                business.website = website
+                db.session.commit()
+        
+        return business.website
     
     def scan_business(self, business_id):
         """Scan a business for online presence"""
@@ -168,94 +576,13 @@ class OnlinePresenceScanner:
             
             logger.info(f"Scanning business: {business.name}")
             
-            # If no website, try to find one
-            if not business.website:
-                website = self.search_business_website(business.name, business.address)
-                if website:
-                    business.website = website
-                    db.session.commit()
-            
             # If we have a website, scan it for social media and contact info
-            if business.website:
-                # Extract social media links
-                social_links = self.extract_social_media_links(business.website)
-                
-                # Add social media contacts
-                for platform, urls in social_links.items():
-                    for url in urls:
-                        # Check if contact already exists
-                        existing_contact = Contact.query.filter_by(
-                            business_id=business.id,
-                            type=platform,
-                            value=url
-                        ).first()
-                        
-                        if not existing_contact:
-                            contact = Contact(
-                                business_id=business.id,
-                                type=platform,
-                                value=url,
-                                source='scanned_website'
-                            )
-                            db.session.add(contact)
-                
-                # Extract contact information
-                contact_info = self.extract_contact_info(business.website)
-                
-                # Add email contacts
-                for email in contact_info['emails']:
-                    existing_contact = Contact.query.filter_by(
-                        business_id=business.id,
-                        type='email',
-                        value=email
-                    ).first()
-                    
-                    if not existing_contact:
-                        contact = Contact(
-                            business_id=business.id,
-                            type='email',
-                            value=email,
-                            source='scanned_website'
-                        )
-                        db.session.add(contact)
-                
-                # Add phone contacts
-                for phone in contact_info['phones']:
-                    existing_contact = Contact.query.filter_by(
-                        business_id=business.id,
-                        type='phone',
-                        value=phone
-                    ).first()
-                    
-                    if not existing_contact:
-                        contact = Contact(
-                            business_id=business.id,
-                            type='phone',
-                            value=phone,
-                            source='scanned_website'
-                        )
-                        db.session.add(contact)
-                
-                # Add contact form contacts
-                for form_url in contact_info['contact_forms']:
-                    existing_contact = Contact.query.filter_by(
-                        business_id=business.id,
-                        type='contact_form',
-                        value=form_url
-                    ).first()
-                    
-                    if not existing_contact:
-                        contact = Contact(
-                            business_id=business.id,
-                            type='contact_form',
-                            value=form_url,
-                            source='scanned_website'
-                        )
-                        db.session.add(contact)
-            
-            # Update business status
-            business.status = 'scanned'
-            db.session.commit()
+            results = None
+            if self.find_website(business):
+                results = self.analyze_website(business.website)
+            
+            self.save_scan_results(business, results)
+            invalidate_cached_responses()
             
             logger.info(f"Successfully scanned business: {business.name}")
             return True
@@ -265,18 +592,48 @@ class OnlinePresenceScanner:
             logger.error(f"Error scanning business {business_id}: {str(e)}")
             return False
     
+    def complete_scan(self, business_id, results):
+        """Save the results of a website fetched by the bulk scan"""
+        try:
+            business = Business.query.get(business_id)
+            self.save_scan_results(business, results)
+            return True
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error scanning business {business_id}: {str(e)}")
+            return False
+    
     def scan_all_pending_businesses(self):
-        """Scan all businesses with pending_scan status"""
+        """Scan all businesses with pending_scan status
+        
+        Websites are fetched concurrently, with a politeness delay per host
+        rather than between every business. Results are saved from the
+        calling thread as each fetch completes, and the cached responses
+        are dropped once at the end.
+        """
+        scanned_count = 0
         try:
             pending_businesses = Business.query.filter_by(status='pending_scan').all()
             
-            scanned_count = 0
+            jobs = []
             for business in pending_businesses:
-                if self.scan_business(business.id):
-                    scanned_count += 1
+                try:
+                    website = self.find_website(business)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error finding website for business {business.id}: {str(e)}")
+                    continue
                 
-                # Add delay to avoid overwhelming servers
-                time.sleep(2)
+                if website:
+                    jobs.append((business.id, website))
+                elif self.complete_scan(business.id, None):
+                    scanned_count += 1
+            
+            scheduler = PoliteScheduler(self.max_workers, self.host_delay)
+            for business_id, results in scheduler.run(jobs, self.analyze_website):
+                if self.complete_scan(business_id, results):
+                    scanned_count += 1
             
             logger.info(f"Scanned {scanned_count} out of {len(pending_businesses)} businesses")
             return scanned_count
@@ -284,6 +641,10 @@ class OnlinePresenceScanner:
         except Exception as e:
             logger.error(f"Error scanning pending businesses: {str(e)}")
             return 0
+        
+        finally:
+            if scanned_count:
+                invalidate_cached_responses()
 
 # Synchronous function for immediate use
 def scan_business_sync(business_id):
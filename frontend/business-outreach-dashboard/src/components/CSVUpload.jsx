@@ -52,6 +52,22 @@ export function CSVUpload() {
     }
   }
 
+  const waitForImport = async (queued) => {
+    // Poll the background import until it finishes
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 2000))
+      const response = await fetch(`${API_BASE_URL}/tasks/${queued.task_id}/status`)
+      const status = await response.json()
+
+      if (status.state === 'SUCCESS') {
+        return { message: 'CSV processing completed.', result: status.result }
+      }
+      if (status.state === 'FAILURE') {
+        throw new Error(status.error || 'Import failed')
+      }
+    }
+  }
+
   const handleUpload = async () => {
     if (!file) {
       setError('Please select a file first')
@@ -74,7 +90,7 @@ export function CSVUpload() {
       const result = await response.json()
 
       if (response.ok) {
-        setUploadResult(result)
+        setUploadResult(result.task_id ? await waitForImport(result) : result)
         setFile(null)
         // Reset file input
         const fileInput = document.getElementById('file-upload')